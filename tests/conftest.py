@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tsfin.constants import CALENDAR, INDEX, DAY_COUNTER, TENOR_PERIOD, BUSINESS_CONVENTION, INDEX_TENOR, CURRENCY, \
+    MATURITY_TENOR, FIXED_LEG_TENOR, COMPOUNDING, FREQUENCY, FIXING_DAYS, QUOTE_TYPE
+
+
+class TimeSeries:
+    """Stand-in for tsio.TimeSeries, with its values, attributes and get_values lookups."""
+
+    def __init__(self, ts_name, ts_values, ts_attributes=None):
+        self.ts_name = ts_name
+        self.ts_values = ts_values
+        self.ts_attributes = dict() if ts_attributes is None else ts_attributes
+
+    def get_attribute(self, attribute):
+        return self.ts_attributes[attribute]
+
+    def get_values(self, index, last_available=True, fill_value=np.nan):
+        values = self.ts_values.ffill() if last_available else self.ts_values
+        if isinstance(index, (list, pd.DatetimeIndex)):
+            return np.array([self.get_values(date, last_available, fill_value) for date in index])
+        # QuantLib dates are looked up by their ISO string.
+        index = pd.Timestamp(index.ISO() if hasattr(index, 'ISO') else index)
+        if last_available:
+            values = values[values.index <= index]
+            return values.iloc[-1] if len(values) else fill_value
+        return values.get(index, fill_value)
+
+
+@pytest.fixture
+def swaption_timeseries():
+    """Function making the time series of a USD swaption volatility, with the given values.
+    """
+    def make(ts_values, ts_name='SWAPTION', maturity_tenor='1Y', tenor='5Y'):
+        attributes = {CALENDAR: 'NYSE', INDEX: 'USDLIBOR', DAY_COUNTER: 'ACTUAL360', TENOR_PERIOD: tenor,
+                      BUSINESS_CONVENTION: 'MODIFIEDFOLLOWING', INDEX_TENOR: '3M', CURRENCY: 'USD',
+                      MATURITY_TENOR: maturity_tenor, FIXED_LEG_TENOR: '6M', COMPOUNDING: 'SIMPLE',
+                      FREQUENCY: 'ANNUAL', FIXING_DAYS: '2', QUOTE_TYPE: 'RATE'}
+        return TimeSeries(ts_name, ts_values, attributes)
+    return make
+
+
+@pytest.fixture
+def deposit_rate_timeseries():
+    """Function making the time series of a deposit rate, with the given values and conventions.
+    """
+    def make(ts_values, tenor='1D', calendar='BZ', day_counter='BUSINESS252', compounding='COMPOUNDED',
+             frequency='ANNUAL'):
+        attributes = {CALENDAR: calendar, TENOR_PERIOD: tenor, DAY_COUNTER: day_counter, COMPOUNDING: compounding,
+                      FREQUENCY: frequency, BUSINESS_CONVENTION: 'FOLLOWING', FIXING_DAYS: '0', QUOTE_TYPE: 'RATE'}
+        return TimeSeries('DEPOSIT', ts_values, attributes)
+    return make
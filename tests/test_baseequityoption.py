@@ -0,0 +1,110 @@
+import types
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('tsio')
+
+from tsfin.constants import OPTION_TYPE, STRIKE_PRICE, OPTION_CONTRACT_SIZE, MATURITY_DATE, CALENDAR, DAY_COUNTER, \
+    EXERCISE_TYPE, UNDERLYING_INSTRUMENT
+from tsfin.base.qlconverters import to_ql_date
+from tsfin.instruments.baseequityoption import BaseEquityOption, black_scholes_price_vega
+from tsfin.instruments.blackscholesmerton import BlackScholesMerton
+
+DATES = pd.bdate_range('2020-01-02', '2020-03-31')
+DATE = DATES[10]
+
+
+class Series:
+    """Time series with the get_values lookups used by the option and its process."""
+
+    def __init__(self, values):
+        self.ts_values = pd.Series(values, index=DATES)
+
+    def get_values(self, index, last_available=True, fill_value=np.nan):
+        index = pd.to_datetime(index.ISO() if hasattr(index, 'ISO') else index)
+        values = self.ts_values[self.ts_values.index <= index] if last_available else self.ts_values[[index]]
+        return values.iloc[-1] if len(values) else fill_value
+
+
+class FlatCurve:
+
+    def zero_rate_to_date(self, date, to_date, compounding, frequency):
+        return 0.03
+
+
+def make_option(exercise_type='EUROPEAN', option_type='CALL', strike=100., maturity='2020-06-19', volatility=0.25,
+                dividend_yield=0.02, spot=100.):
+    underlying = types.SimpleNamespace(price=Series(spot), eqy_dvd_yld_12m=Series(dividend_yield))
+    timeseries = types.SimpleNamespace(ts_name='OPTION', ivol_mid=Series(volatility), px_mid=Series(8.),
+                                       ts_attributes={OPTION_TYPE: option_type, STRIKE_PRICE: strike,
+                                                      OPTION_CONTRACT_SIZE: 100, MATURITY_DATE: maturity,
+                                                      CALENDAR: 'NYSE', DAY_COUNTER: 'ACTUAL365',
+                                                      EXERCISE_TYPE: exercise_type, UNDERLYING_INSTRUMENT: 'UND'})
+    return BaseEquityOption(timeseries, BlackScholesMerton({'UND': underlying}, FlatCurve()))
+
+
+@pytest.mark.parametrize('option_type', ['CALL', 'PUT'])
+def test_implied_vol_slice_matches_implied_vol(option_type):
+    option = make_option(option_type=option_type)
+    targets = option.price(DATE, DATE) * np.array([0.5, 0.8, 1., 1.5, 2.])
+    expected = [option.implied_vol(DATE, target) for target in targets]
+    result = option.implied_vol_slice(DATE, option.strike, targets)
+    np.testing.assert_allclose(result, expected, atol=1e-4)
+
+
+def test_implied_vol_slice_nan_where_unsolvable():
+    option = make_option()
+    result = option.implied_vol_slice(DATE, 100., [-1., 1e6, 99., option.price(DATE, DATE)])
+    # The third price needs a volatility above the solver cap.
+    assert np.isnan(result[:3]).all()
+    assert result[3] == pytest.approx(0.25, abs=1e-4)
+
+
+@pytest.mark.parametrize('spot', [100., 5e3, 1.3e5, 2e6])
+@pytest.mark.parametrize('option_type', ['CALL', 'PUT'])
+def test_implied_vol_slice_large_prices(spot, option_type):
+    option = make_option(option_type=option_type, strike=spot, spot=spot)
+    ql_date = to_ql_date(DATE)
+    option.price(DATE, DATE)
+    process = option.ql_process.bsm_process
+    discount = process.riskFreeRate().discount(option.option_maturity)
+    forward = spot * process.dividendYield().discount(option.option_maturity) / discount
+    time = option.day_counter.yearFraction(ql_date, option.option_maturity)
+    strikes = spot * np.array([0.5, 0.7, 0.9, 1., 1.1, 1.3, 1.6])
+    prices, _ = black_scholes_price_vega(forward, strikes, discount, time, 0.3, option_type == 'CALL')
+    np.testing.assert_allclose(option.implied_vol_slice(DATE, strikes, prices), 0.3, atol=1e-6)
+
+
+def test_implied_vol_slice_broadcasts_strikes():
+    option = make_option()
+    strikes = np.array([[90., 100.], [110., 120.]])
+    result = option.implied_vol_slice(DATE, strikes, 12.)
+    assert result.shape == strikes.shape
+    expected = [option.implied_vol_slice(DATE, [strike], [12.])[0] for strike in strikes.ravel()]
+    np.testing.assert_allclose(result.ravel(), expected)
+
+
+def test_implied_vol_slice_european_only():
+    with pytest.raises(ValueError):
+        make_option(exercise_type='American').implied_vol_slice(DATE, [100.], [5.])
+
+
+def test_implied_vol_american_call_above_european_cap():
+    option = make_option(exercise_type='AMERICAN', strike=40., maturity='2022-11-21', volatility=1.5,
+                         dividend_yield=0.1)
+    target = option.price(DATE, DATE)
+    process = option.ql_process.bsm_process
+    # Early exercise makes the call worth more than the European bound, the spot net of dividends.
+    assert target > process.x0() * process.dividendYield().discount(option.option_maturity)
+    # The price is flat in the volatility this high, so the tree only gives it back roughly.
+    assert option.implied_vol(DATE, target) == pytest.approx(1.5, abs=0.05)
+
+
+def test_american_options_cached_for_the_last_date_only():
+    option = make_option(exercise_type='AMERICAN', option_type='PUT')
+    prices = [option.price(date, date) for date in DATES[:20]]
+    assert len(option._ql_options) == 1
+    assert len(option._engine_options) == 1
+    for date, price in zip(DATES[:20], prices):
+        assert make_option(exercise_type='AMERICAN', option_type='PUT').price(date, date) == pytest.approx(price)
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+import pytest
+import QuantLib as ql
+
+pytest.importorskip('tsio')
+
+from tsfin.base.basetools import filter_series, to_datetime
+
+
+def baseline_filter_series(df, initial_date=None, final_date=None):
+    # filter_series before the searchsorted rewrite.
+    if initial_date is None and final_date is not None:
+        final_date = pd.to_datetime(final_date)
+        df.drop(df[(df.index > final_date)].index, inplace=True)
+    elif final_date is None and initial_date is not None:
+        initial_date = pd.to_datetime(initial_date)
+        df.drop(df[(df.index < initial_date)].index, inplace=True)
+    elif final_date is None and initial_date is None:
+        pass
+    elif initial_date == final_date:
+        initial_date = pd.to_datetime(initial_date)
+        df.drop(df[(df.index != initial_date)].index, inplace=True)
+    else:
+        initial_date = pd.to_datetime(initial_date)
+        final_date = pd.to_datetime(final_date)
+        df.drop(df[(df.index < initial_date) | (df.index > final_date)].index, inplace=True)
+
+
+def assert_filtered_as_baseline(df, initial_date, final_date):
+    expected = df.copy()
+    baseline_filter_series(expected, initial_date, final_date)
+    assert filter_series(df, initial_date, final_date) is None
+    if isinstance(df, pd.DataFrame):
+        pd.testing.assert_frame_equal(df, expected)
+    else:
+        pd.testing.assert_series_equal(df, expected)
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_filter_series_matches_baseline(seed):
+    rng = np.random.default_rng(seed)
+    # Random dates, with repetitions, some of them before 1970.
+    index = pd.DatetimeIndex(np.sort(rng.choice(pd.date_range('1969-06-01', '1970-06-01'), 40)))
+    if seed % 3 == 0:
+        index = index[rng.permutation(len(index))]
+    df = pd.DataFrame(rng.normal(size=(len(index), 2)), index=index)
+    if seed % 2:
+        df = df[0]
+    bounds = [None, index[rng.integers(len(index))], pd.Timestamp('1969-01-01'), pd.Timestamp('1971-01-01'),
+              pd.Timestamp('1969-12-31 12:00')]
+    initial_date, final_date = bounds[rng.integers(len(bounds))], bounds[rng.integers(len(bounds))]
+    if seed % 5 == 0:
+        final_date = initial_date
+    assert_filtered_as_baseline(df, initial_date, final_date)
+
+
+@pytest.mark.parametrize('initial_date, final_date', [
+    ('2020-01-03', '2020-01-08'),
+    (datetime(2020, 1, 3), None),
+    (None, np.datetime64('2020-01-08')),
+    ('2020-01-06', '2020-01-06'),
+    ('2020-01-08', '2020-01-03'),
+])
+def test_filter_series_date_likes(initial_date, final_date):
+    assert_filtered_as_baseline(pd.Series(1., index=pd.date_range('2020-01-01', periods=10)), initial_date,
+                                final_date)
+
+
+def test_filter_series_tz_aware():
+    df = pd.Series(1., index=pd.date_range('2020-01-01', periods=10, tz='America/Sao_Paulo'))
+    assert_filtered_as_baseline(df, pd.Timestamp('2020-01-03', tz='America/Sao_Paulo'),
+                                pd.Timestamp('2020-01-07 01:00', tz='UTC'))
+
+
+def baseline_to_datetime(arg):
+    try:
+        return datetime(day=arg.dayOfMonth(), month=arg.month(), year=arg.year())
+    except AttributeError:
+        return pd.to_datetime(arg)
+
+
+@pytest.mark.parametrize('arg', [
+    ql.Date(15, 3, 1950), ql.Date(31, 12, 1969), ql.Date(1, 1, 1901), ql.Date(29, 2, 2020), '1950-03-15',
+    np.datetime64('1969-12-31'), datetime(1960, 2, 29, 12), pd.Timestamp('1965-06-30'),
+    datetime(2020, 1, 1, 23, tzinfo=timezone(timedelta(hours=-3))), datetime(2020, 1, 2, 2, tzinfo=timezone.utc),
+    pd.Timestamp('1965-06-30 22:00', tz='America/Sao_Paulo'),
+])
+def test_to_datetime_matches_baseline(arg):
+    # Twice, so the second call goes through the cache.
+    for _ in range(2):
+        result, expected = to_datetime(arg), baseline_to_datetime(arg)
+        assert result == expected
+        assert getattr(result, 'tzinfo', None) == getattr(expected, 'tzinfo', None)
+
+
+def test_to_datetime_tz_aware_keeps_zone():
+    local = datetime(2020, 1, 1, 23, tzinfo=timezone(timedelta(hours=-3)))
+    utc = datetime(2020, 1, 2, 2, tzinfo=timezone.utc)
+    assert to_datetime(local).day == 1
+    assert to_datetime(utc).day == 2
+    assert to_datetime(utc).tzinfo == timezone.utc
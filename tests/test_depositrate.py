@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+import QuantLib as ql
+
+pytest.importorskip('tsio')
+
+from tsfin.instruments.depositrate import DepositRate
+
+DATES = pd.bdate_range('2019-12-02', '2020-12-31')
+
+
+def baseline_fixing_maturity_dates(deposit_rate, start_date, end_date):
+    # _get_fixing_maturity_dates before business-day schedules were fetched in one call.
+    start_date = deposit_rate.calendar.adjust(start_date)
+    end_date = deposit_rate.calendar.adjust(end_date)
+    fixing_dates = list()
+    maturity_dates = list()
+    fixing_date = deposit_rate.calendar.adjust(start_date)
+    maturity_date = deposit_rate.calendar.advance(fixing_date, deposit_rate.tenor(start_date))
+    while maturity_date < end_date:
+        fixing_dates.append(fixing_date)
+        maturity_dates.append(maturity_date)
+        fixing_date = maturity_date
+        maturity_date = deposit_rate.calendar.advance(fixing_date, deposit_rate.tenor(start_date))
+    fixing_dates.append(fixing_date)
+    maturity_dates.append(end_date)
+    return fixing_dates, maturity_dates
+
+
+@pytest.mark.parametrize('tenor', ['1D', '2D', '5D', '1W', '1M', '3M'])
+@pytest.mark.parametrize('calendar', ['BZ', 'NYSE', 'TARGET'])
+@pytest.mark.parametrize('start_date, end_date', [
+    (ql.Date(2, 1, 2020), ql.Date(30, 6, 2020)),
+    # Holidays and weekends at both ends.
+    (ql.Date(25, 12, 2019), ql.Date(26, 12, 2020)),
+    (ql.Date(2, 1, 2020), ql.Date(3, 1, 2020)),
+    (ql.Date(2, 1, 2020), ql.Date(2, 1, 2020)),
+])
+def test_fixing_maturity_dates_match_baseline(deposit_rate_timeseries, tenor, calendar, start_date, end_date):
+    deposit_rate = DepositRate(deposit_rate_timeseries(pd.Series(0.05, index=DATES), tenor=tenor, calendar=calendar))
+    assert deposit_rate._get_fixing_maturity_dates(start_date, end_date) == \
+        baseline_fixing_maturity_dates(deposit_rate, start_date, end_date)
+
+
+def baseline_compound_factor(deposit_rate, fixings, fixing_dates, maturity_dates, start_date, date):
+    # Product of the QuantLib compound factors, as computed before the closed forms.
+    factor = 1.0
+    for fixing, fixing_date, maturity_date in zip(fixings, fixing_dates, maturity_dates):
+        factor *= ql.InterestRate(fixing, deposit_rate.day_counter, deposit_rate.compounding,
+                                  deposit_rate.frequency).compoundFactor(fixing_date, maturity_date, start_date, date)
+    return factor
+
+
+@pytest.mark.parametrize('compounding, frequency', [('SIMPLE', 'ANNUAL'), ('CONTINUOUS', 'ANNUAL'),
+                                                    ('COMPOUNDED', 'ANNUAL'), ('COMPOUNDED', 'SEMIANNUAL'),
+                                                    ('COMPOUNDED', 'MONTHLY')])
+@pytest.mark.parametrize('day_counter', ['BUSINESS252', 'ACTUAL360', 'ACTUAL365', 'THIRTY360E'])
+@pytest.mark.parametrize('tenor', ['1D', '1M'])
+def test_compound_factor_matches_baseline(deposit_rate_timeseries, compounding, frequency, day_counter, tenor):
+    deposit_rate = DepositRate(deposit_rate_timeseries(pd.Series(0.05, index=DATES), tenor=tenor,
+                                                       day_counter=day_counter, compounding=compounding,
+                                                       frequency=frequency))
+    start_date, date = ql.Date(2, 1, 2020), ql.Date(15, 9, 2020)
+    fixing_dates, maturity_dates = deposit_rate._get_fixing_maturity_dates(start_date, date)
+    fixings = [0.04 + 0.001 * (i % 7) for i in range(len(fixing_dates))]
+    result = deposit_rate._compound_factor(fixings, fixing_dates, maturity_dates, start_date, date)
+    expected = baseline_compound_factor(deposit_rate, fixings, fixing_dates, maturity_dates, start_date, date)
+    assert result == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize('spread', [None, 0.01])
+def test_performance_matches_baseline(deposit_rate_timeseries, spread):
+    values = pd.Series(0.05 + 0.0001 * (DATES.dayofyear % 11), index=DATES)
+    deposit_rate = DepositRate(deposit_rate_timeseries(values))
+    start_date, date = pd.Timestamp('2020-01-02'), pd.Timestamp('2020-07-31')
+    fixing_dates, maturity_dates = deposit_rate._get_fixing_maturity_dates(ql.Date(2, 1, 2020), ql.Date(31, 7, 2020))
+    fixings = values.reindex(pd.to_datetime([fixing_date.ISO() for fixing_date in fixing_dates]), method='ffill')
+    fixings = fixings.to_numpy() + (0 if spread is None else spread)
+    expected = baseline_compound_factor(deposit_rate, fixings, fixing_dates, maturity_dates, ql.Date(2, 1, 2020),
+                                        ql.Date(31, 7, 2020)) - 1
+    assert deposit_rate.performance(start_date=start_date, date=date, spread=spread) == pytest.approx(expected)
@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('tsio')
+
+from tsfin.portfolio.portfolio import Portfolio, find_lt, trade
+
+
+class Security:
+
+    def __init__(self, ts_name, coupon, maturity=None):
+        self.ts_name = ts_name
+        self.coupon = coupon
+        self.maturity = maturity
+
+    def value(self, date, last_available=True):
+        return 100.
+
+    def cash_to_date(self, start_date, date):
+        return self.coupon * (date - start_date).days
+
+    def is_expired(self, date):
+        return self.maturity is not None and date >= self.maturity
+
+
+class Cash(Security):
+
+    def __init__(self):
+        super().__init__('USD', 0.)
+
+
+def make_portfolio():
+    portfolio = Portfolio('USD', [Cash(), Security('A', 0.1), Security('B', 0.2, pd.Timestamp('2020-01-08'))])
+    start = pd.Timestamp('2020-01-01')
+    portfolio.add_position(start, 'USD', 1000.)
+    portfolio.add_trade(start, 'A', trade(3, 100.))
+    portfolio.add_trade(start, 'B', trade(2, 50.))
+    return portfolio
+
+
+def test_positions_frame_matches_positions():
+    portfolio = make_portfolio()
+    portfolio.add_trade(pd.Timestamp('2020-01-03'), 'A', trade(-3, 105.))
+    frame = portfolio.positions_frame()
+    assert list(frame.index) == sorted(portfolio.positions)
+    for date, positions in portfolio.positions.items():
+        for name in frame.columns:
+            assert frame.loc[date, name] == positions.get(name, 0)
+
+
+def test_positions_frame_of_dates():
+    portfolio = make_portfolio()
+    portfolio.add_trade(pd.Timestamp('2020-01-03'), 'A', trade(1, 105.))
+    frame = portfolio.positions_frame([pd.Timestamp('2020-01-03')])
+    assert frame.to_dict('index') == {pd.Timestamp('2020-01-03'): portfolio.positions[pd.Timestamp('2020-01-03')]}
+
+
+def test_find_lt_many_matches_find_lt():
+    portfolio = make_portfolio()
+    portfolio.add_trade(pd.Timestamp('2020-01-05'), 'A', trade(1, 101.))
+    dates = pd.to_datetime(['2020-01-02', '2020-01-05', '2020-01-06', '2020-01-20'])
+    expected = [find_lt(date, sorted(portfolio.positions)) for date in dates]
+    assert list(pd.to_datetime(portfolio.find_lt_many(dates))) == expected
+    with pytest.raises(ValueError):
+        portfolio.find_lt_many([pd.Timestamp('2020-01-01')])
+
+
+def test_carry_to_range_matches_carry_to():
+    dates = pd.date_range('2020-01-02', '2020-01-12')
+    expected = make_portfolio()
+    for date in dates:
+        expected.carry_to(date)
+    portfolio = make_portfolio()
+    # Unsorted and repeated dates are carried in order, once.
+    portfolio.carry_to_range(list(reversed(dates)) + [dates[3]])
+    assert portfolio.positions == expected.positions
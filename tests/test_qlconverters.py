@@ -0,0 +1,149 @@
+from datetime import date, datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+import pytest
+import QuantLib as ql
+
+pytest.importorskip('tsio')
+
+from tsfin.base.basetools import to_datetime_index
+from tsfin.base import qlconverters
+from tsfin.base.qlconverters import to_ql_date, to_ql_dates
+
+
+@pytest.mark.parametrize('dates', [
+    pd.bdate_range('1999-12-20', '2000-03-10'),
+    pd.date_range('2020-01-01', periods=10, freq='D', tz='America/Sao_Paulo'),
+    ['2020-01-31', '2019-02-28', '2020-02-29'],
+    [datetime(2020, 1, 1, 23, 59), np.datetime64('2018-06-30'), pd.Timestamp('1970-01-01')],
+])
+def test_to_ql_dates_matches_to_ql_date(dates):
+    assert to_ql_dates(dates) == [to_ql_date(date) for date in dates]
+
+
+def test_to_ql_dates_round_trip():
+    dates = pd.bdate_range('2010-01-01', '2030-12-31')
+    assert (to_datetime_index(to_ql_dates(dates)) == dates).all()
+
+
+# Values returned by the if/elif chains the converter tables replaced.
+BASELINE_ENUMS = {
+    'to_ql_frequency': {'ANNUAL': ql.Annual, 'SEMIANNUAL': ql.Semiannual, 'QUARTERLY': ql.Quarterly,
+                        'BIMONTHLY': ql.Bimonthly, 'MONTHLY': ql.Monthly, 'AT_MATURITY': ql.Once},
+    'to_ql_business_convention': {'FOLLOWING': ql.Following, 'MODIFIEDFOLLOWING': ql.ModifiedFollowing,
+                                  'UNADJUSTED': ql.Unadjusted},
+    'to_ql_date_generation': {'FORWARD': ql.DateGeneration.Forward, 'BACKWARD': ql.DateGeneration.Backward,
+                              'CDS20IMM': ql.DateGeneration.TwentiethIMM, 'CDS2015': ql.DateGeneration.CDS2015,
+                              'CDS': ql.DateGeneration.CDS},
+    'to_ql_compounding': {'COMPOUNDED': ql.Compounded, 'SIMPLE': ql.Simple, 'CONTINUOUS': ql.Continuous},
+    'to_ql_option_type': {'CALL': ql.Option.Call, 'PUT': ql.Option.Put},
+    'to_ql_duration': {'MODIFIED': ql.Duration.Modified, 'SIMPLE': ql.Duration.Simple,
+                       'MACAULAY': ql.Duration.Macaulay},
+    'to_ql_short_rate_model': {'HULL_WHITE': ql.HullWhite, 'BLACK_KARASINSKI': ql.BlackKarasinski, 'G2': ql.G2},
+}
+
+# US and THIRTY360 are left out: their default QuantLib constructors were removed in newer versions, in the baseline
+# as well as in the tables.
+BASELINE_CALENDARS = {
+    'NYSE': ql.UnitedStates(ql.UnitedStates.NYSE),
+    'UK': ql.UnitedKingdom(), 'BZ': ql.Brazil(), 'TARGET': ql.TARGET(),
+    'FD': ql.UnitedStates(ql.UnitedStates.FederalReserve),
+}
+
+BASELINE_DAY_COUNTERS = {
+    'THIRTY360E': ql.Thirty360(ql.Thirty360.European), 'ACTUAL360': ql.Actual360(),
+    'ACTUAL365': ql.Actual365Fixed(), 'ACTUALACTUAL': ql.ActualActual(ql.ActualActual.ISMA),
+    'ACTUALACTUALISMA': ql.ActualActual(ql.ActualActual.ISMA),
+    'ACTUALACTUALISDA': ql.ActualActual(ql.ActualActual.ISDA), 'BUSINESS252': ql.Business252(),
+}
+
+
+def spellings(name):
+    return [name, name.lower(), name.capitalize()]
+
+
+@pytest.mark.parametrize('converter, name, expected', [
+    (converter, spelling, expected) for converter, table in BASELINE_ENUMS.items()
+    for name, expected in table.items() for spelling in spellings(name)
+])
+def test_enum_converters_match_baseline(converter, name, expected):
+    assert getattr(qlconverters, converter)(name) == expected
+
+
+@pytest.mark.parametrize('name', [spelling for name in BASELINE_CALENDARS for spelling in spellings(name)])
+def test_to_ql_calendar_matches_baseline(name):
+    calendar = qlconverters.to_ql_calendar(name)
+    assert calendar.name() == BASELINE_CALENDARS[name.upper()].name()
+    assert calendar is qlconverters.to_ql_calendar(name.upper())
+
+
+@pytest.mark.parametrize('name', [spelling for name in BASELINE_DAY_COUNTERS for spelling in spellings(name)])
+def test_to_ql_day_counter_matches_baseline(name):
+    day_counter = qlconverters.to_ql_day_counter(name)
+    assert day_counter.name() == BASELINE_DAY_COUNTERS[name.upper()].name()
+    assert day_counter is qlconverters.to_ql_day_counter(name.upper())
+
+
+@pytest.mark.parametrize('name', [spelling for name in ['USD', 'BRL', 'EUR'] for spelling in spellings(name)])
+def test_to_ql_currency_matches_baseline(name):
+    assert qlconverters.to_ql_currency(name).code() == name.upper()
+
+
+def test_index_converters_match_baseline():
+    assert qlconverters.to_ql_index('fedfunds').name() == ql.FedFunds().name()
+    assert qlconverters.to_ql_index('USDLIBOR') is ql.USDLibor
+    assert qlconverters.to_ql_overnight_index('FedFunds').name() == ql.FedFunds().name()
+    assert qlconverters.to_ql_rate_index('fedfunds').name() == ql.FedFunds().name()
+    libor = qlconverters.to_ql_rate_index('usdlibor', ql.Period(3, ql.Months))
+    assert libor.name() == ql.USDLibor(ql.Period(3, ql.Months)).name()
+    libor = qlconverters.to_ql_float_index('USDLIBOR', ql.Period(6, ql.Months), ql.YieldTermStructureHandle())
+    assert libor.name() == ql.USDLibor(ql.Period(6, ql.Months)).name()
+    # Indices link to term structures, so each call builds a new one.
+    assert qlconverters.to_ql_index('FEDFUNDS') is not qlconverters.to_ql_index('FEDFUNDS')
+
+
+@pytest.mark.parametrize('converter', [
+    'to_ql_frequency', 'to_ql_calendar', 'to_ql_currency', 'to_ql_business_convention', 'to_ql_day_counter',
+    'to_ql_date_generation', 'to_ql_compounding', 'to_ql_index', 'to_ql_overnight_index', 'to_ql_rate_index',
+    'to_ql_option_type', 'to_ql_short_rate_model',
+])
+def test_unknown_names_raise(converter):
+    with pytest.raises(ValueError):
+        getattr(qlconverters, converter)('UNKNOWN')
+
+
+def test_to_ql_duration_defaults_to_macaulay():
+    assert qlconverters.to_ql_duration('UNKNOWN') == ql.Duration.Macaulay
+
+
+def baseline_to_ql_date(arg):
+    if isinstance(arg, ql.Date):
+        return arg
+    arg = pd.to_datetime(arg)
+    return ql.Date(arg.day, arg.month, arg.year)
+
+
+@pytest.mark.parametrize('arg', [
+    '1950-03-15', '1901-01-01', np.datetime64('1969-12-31'), date(1901, 7, 4), datetime(1969, 12, 31, 23, 59),
+    pd.Timestamp('1960-02-29'), '2020-02-29', np.datetime64('2020-01-01T23:00'), ql.Date(15, 3, 1950),
+    datetime(2020, 1, 1, 23, tzinfo=timezone(timedelta(hours=-3))), datetime(2020, 1, 2, 2, tzinfo=timezone.utc),
+    pd.Timestamp('1965-06-30 22:00', tz='America/Sao_Paulo'), pd.Timestamp('1965-07-01 01:00', tz='UTC'),
+])
+def test_to_ql_date_matches_baseline(arg):
+    # Twice, so the second call goes through the cache.
+    assert to_ql_date(arg) == baseline_to_ql_date(arg)
+    assert to_ql_date(arg) == baseline_to_ql_date(arg)
+
+
+def test_to_ql_date_tz_aware_uses_local_dates():
+    local = datetime(2020, 1, 1, 23, tzinfo=timezone(timedelta(hours=-3)))
+    utc = datetime(2020, 1, 2, 2, tzinfo=timezone.utc)
+    assert local == utc
+    assert to_ql_date(local) == ql.Date(1, 1, 2020)
+    assert to_ql_date(utc) == ql.Date(2, 1, 2020)
+    assert to_ql_dates([local]) == [ql.Date(1, 1, 2020)]
+
+
+def test_to_ql_dates_before_1970():
+    dates = pd.date_range('1901-01-01', '1970-01-05', freq='W')
+    assert to_ql_dates(dates) == [baseline_to_ql_date(date) for date in dates]
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('tsio')
+
+from tsfin.instruments.swaption import SwapOption
+
+DATES = pd.bdate_range('2020-01-02', periods=10)
+
+
+@pytest.mark.parametrize('last_available', [True, False])
+def test_rate_helpers_match_rate_helper(swaption_timeseries, last_available):
+    values = 0.2 + 0.01 * np.arange(len(DATES))
+    values[[0, 3]] = np.nan
+    swaption = SwapOption(swaption_timeseries(pd.Series(values, index=DATES)))
+    helpers = swaption.rate_helpers(list(DATES), last_available=last_available)
+    assert len(helpers) == len(DATES)
+    for date, helper in zip(DATES, helpers):
+        expected = swaption.rate_helper(date, last_available=last_available)
+        if expected is None:
+            assert helper is None
+        else:
+            assert helper.volatility().value() == expected.volatility().value()
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import pytest
+import QuantLib as ql
+from pandas.tseries.offsets import BDay, Week, BMonthEnd, BYearEnd
+
+pytest.importorskip('tsio')
+
+from tsfin import tools
+from tsfin.base.basetools import to_datetime
+from tsfin.base.qlconverters import to_ql_date
+from tsfin.instruments.swaption import SwapOption
+
+DATES = list(pd.bdate_range('2020-01-02', periods=5))
+
+
+def prices(columns=None, seed=0):
+    # Business days with some missing, starting with missing values.
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2017-12-20', '2021-03-10')
+    index = index[rng.random(len(index)) > 0.1]
+    shape = len(index) if columns is None else (len(index), columns)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, shape), axis=0))
+    values[:3] = np.nan
+    if columns is None:
+        return pd.Series(values, index=index, name='PRICE')
+    return pd.DataFrame(values, index=index)
+
+
+class Option:
+
+    def __init__(self, strike):
+        self.strike = strike
+
+    def price(self, date, base_date, scale=1.):
+        return scale * (self.strike + date.day - base_date.day / 2)
+
+    def delta(self, date, base_date):
+        return self.strike / date.day
+
+    def rho(self, date, base_date):
+        # Like BaseEquityOption.rho of American options.
+        return None if self.strike > 15 else date.day
+
+
+def option_factory():
+    return {name: Option(strike) for name, strike in [('A', 10.), ('B', 20.), ('C', 30.)]}
+
+
+@pytest.mark.parametrize('metric, kwargs', [('price', {}), ('price', {'scale': 2.}), ('delta', {})])
+@pytest.mark.parametrize('workers', [1, 2])
+def test_price_many_matches_metric(metric, kwargs, workers):
+    names = ['C', 'A', 'B']
+    options = option_factory()
+    expected = [[getattr(options[name], metric)(date=date, base_date=date, **kwargs) for date in DATES]
+                for name in names]
+    result = tools.price_many(option_factory, names, DATES, metric, workers=workers, **kwargs)
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_price_many_missing_metric_is_nan(workers):
+    result = tools.price_many(option_factory, ['A', 'B'], DATES, 'rho', workers=workers)
+    np.testing.assert_array_equal(result, [[date.day for date in DATES], [np.nan] * len(DATES)])
+
+
+def test_price_many_serial_keeps_no_options():
+    tools.price_many(option_factory, ['A'], DATES, workers=1)
+    assert not tools._worker_options
+
+
+class CurveTimeSeries:
+
+    def __init__(self):
+        self.yield_curves = dict()
+
+    def yield_curve(self, date):
+        return self.yield_curves.setdefault(date, ql.FlatForward(date, 0.03, ql.Actual365Fixed()))
+
+
+@pytest.fixture
+def swaptions(swaption_timeseries):
+    dates = pd.bdate_range('2020-01-02', periods=5)
+    tenors = [('1Y', '5Y'), ('2Y', '5Y'), ('5Y', '5Y'), ('1Y', '10Y')]
+    return [SwapOption(swaption_timeseries(pd.Series(0.2 + 0.02 * i, index=dates), 'SWAPTION{}'.format(i), *tenor))
+            for i, tenor in enumerate(tenors)]
+
+
+def test_calibrate_swaption_model_cache(swaptions, capsys):
+    tools._calibrated_params.clear()
+    date = ql.Date(6, 1, 2020)
+    curve = CurveTimeSeries()
+    model = tools.calibrate_swaption_model(date, 'HULL_WHITE', curve, swaptions, cache=True)
+    cached = tools.calibrate_swaption_model(date, 'HULL_WHITE', curve, swaptions, cache=True)
+    assert capsys.readouterr().out.count('Calibrating') == 1
+    # Each call gets its own model, with the parameters of the first calibration.
+    assert cached is not model
+    assert list(cached.params()) == list(model.params())
+    assert ql.Settings.instance().evaluationDate == date
+
+    swaptions[0].ts_values.iloc[:] = 0.35
+    changed = tools.calibrate_swaption_model(date, 'HULL_WHITE', curve, swaptions, cache=True)
+    assert capsys.readouterr().out.count('Calibrating') == 1
+    assert list(changed.params()) != list(model.params())
+
+
+def test_calibrate_swaption_model_cache_is_opt_in(swaptions, capsys):
+    tools._calibrated_params.clear()
+    date = ql.Date(6, 1, 2020)
+    curve = CurveTimeSeries()
+    model = tools.calibrate_swaption_model(date, 'HULL_WHITE', curve, swaptions)
+    again = tools.calibrate_swaption_model(date, 'HULL_WHITE', curve, swaptions)
+    assert capsys.readouterr().out.count('Calibrating') == 2
+    assert not tools._calibrated_params
+    assert list(again.params()) == pytest.approx(list(model.params()))
+
+
+def test_weekly_returns_match_baseline():
+    # Baseline weekly returns, with raw=True since pandas no longer indexes the windows by position.
+    for df in (prices(), prices(columns=3)):
+        expected = df.resample(BDay()).ffill().rolling(6, min_periods=2).apply(lambda x: x[-1] / x[0] - 1, raw=True)
+        if isinstance(df, pd.DataFrame):
+            pd.testing.assert_frame_equal(tools.returns(df, 'W'), expected)
+        else:
+            pd.testing.assert_series_equal(tools.returns(df, 'W'), expected)
+
+
+@pytest.mark.parametrize('calc_type, offset', [('WTD', Week(weekday=4)), ('MTD', BMonthEnd()), ('YTD', BYearEnd())])
+def test_to_date_returns_match_baseline(calc_type, offset):
+    # The last one spans no period end.
+    for df in (prices(), prices(columns=3), prices().iloc[:40], prices().iloc[10:13]):
+        anchors = pd.date_range(df.first_valid_index(), df.last_valid_index(), freq=offset)
+        expected = df / df.reindex(anchors, method='pad').reindex(df.index, method='pad') - 1
+        result = tools.returns(df, calc_type)
+        if isinstance(df, pd.DataFrame):
+            pd.testing.assert_frame_equal(result, expected)
+        else:
+            pd.testing.assert_series_equal(result, expected)
+
+
+def month_shifted(index, months):
+    # Baseline month shifts, through QuantLib dates.
+    return index.map(lambda date: to_datetime(to_ql_date(date) - ql.Period(months, ql.Months)))
+
+
+@pytest.mark.parametrize('force', [False, True])
+@pytest.mark.parametrize('calc_type, shift', [
+    ('M', lambda index: month_shifted(index, 1)),
+    ('6M', lambda index: month_shifted(index, 6)),
+    ('Y', lambda index: index - pd.DateOffset(years=1)),
+    ('3Y', lambda index: index - pd.DateOffset(years=3)),
+])
+def test_period_returns_match_baseline(calc_type, shift, force):
+    df = prices()
+    # Month ends, where the QuantLib and pandas month shifts both clamp to the end of shorter months.
+    df = pd.concat([df, pd.Series(101., index=pd.to_datetime(['2021-03-31', '2021-05-31', '2024-02-29']))])
+    df_ago = df.reindex(shift(df.index), method='pad')
+    if force:
+        df_ago = df_ago.fillna(df.loc[df.first_valid_index()])
+    expected = pd.Series(index=df.index, data=df.values / df_ago.values) - 1
+    pd.testing.assert_series_equal(tools.returns(df, calc_type, force=force), expected, check_names=False)
@@ -17,7 +17,7 @@
 """
 Basic independent tools that can be imported by any module in the package.
 """
-from functools import wraps
+from functools import lru_cache, wraps
 from bisect import bisect_right
 import time
 from datetime import datetime
@@ -47,11 +47,51 @@ def to_datetime(arg):
             return pd.to_datetime(arg)
     else:
         # arg is not vectorizable.
+        if isinstance(arg, ql.Date):
+            return _serial_to_datetime(arg.serialNumber())
+        elif isinstance(arg, pd.Timestamp):
+            return arg
         try:
-            # Works if arg is a ql.Date object.
+            # Works if arg is a ql.Date like object.
             return datetime(day=arg.dayOfMonth(), month=arg.month(), year=arg.year())
         except AttributeError:
-            return pd.to_datetime(arg)
+            if getattr(arg, 'tzinfo', None) is not None:
+                # Equal instants in different time zones are equal keys, so tz-aware datetimes skip the cache.
+                return pd.to_datetime(arg)
+            try:
+                return _parsed_datetime(arg)
+            except TypeError:
+                # Unhashable argument, can't be cached.
+                return pd.to_datetime(arg)
+
+
+@lru_cache(maxsize=4096)
+def _serial_to_datetime(serial_number):
+    date = ql.Date(serial_number)
+    return datetime(day=date.dayOfMonth(), month=date.month(), year=date.year())
+
+
+_parsed_datetime = lru_cache(maxsize=4096)(pd.to_datetime)
+
+
+# QuantLib serial number of 1970-01-01, the origin of numpy.datetime64 day counts.
+QL_EPOCH_SERIAL = 25569
+
+
+def to_datetime_index(arg):
+    """Converts a list-like of QuantLib.Date instances to a pandas.DatetimeIndex.
+
+    Parameters
+    ----------
+    arg: list-like of QuantLib.Date
+
+    Returns
+    -------
+    pandas.DatetimeIndex
+
+    """
+    serials = np.fromiter((date.serialNumber() for date in arg), dtype=np.int64, count=len(arg))
+    return pd.to_datetime(serials - QL_EPOCH_SERIAL, unit='D')
 
 
 def collapse_intraday_ts_values(ts_list, initial_date=None, final_date=None):
@@ -202,22 +242,25 @@ def filter_series(df, initial_date=None, final_date=None):
     final_date: datetime.datetime, optional
 
     """
-
-    if initial_date is None and final_date is not None:
-        final_date = pd.to_datetime(final_date)
-        df.drop(df[(df.index > final_date)].index, inplace=True)
-    elif final_date is None and initial_date is not None:
-        initial_date = pd.to_datetime(initial_date)
-        df.drop(df[(df.index < initial_date)].index, inplace=True)
-    elif final_date is None and initial_date is None:
-        pass
-    elif initial_date == final_date:
-        initial_date = pd.to_datetime(initial_date)
-        df.drop(df[(df.index != initial_date)].index, inplace=True)
-    else:
-        initial_date = pd.to_datetime(initial_date)
-        final_date = pd.to_datetime(final_date)
-        df.drop(df[(df.index < initial_date) | (df.index > final_date)].index, inplace=True)
+    if initial_date is None and final_date is None:
+        return
+    initial_date = None if initial_date is None else to_datetime(initial_date)
+    final_date = None if final_date is None else to_datetime(final_date)
+    index = df.index
+    if not index.is_monotonic_increasing:
+        keep = np.ones(len(index), dtype=bool)
+        if initial_date is not None:
+            keep &= index >= initial_date
+        if final_date is not None:
+            keep &= index <= final_date
+        df.drop(index[~keep], inplace=True)
+        return
+    # The dates to keep are a contiguous range of a sorted index, so only its bounds need to be found.
+    start = 0 if initial_date is None else index.searchsorted(initial_date, side='left')
+    end = len(index) if final_date is None else index.searchsorted(final_date, side='right')
+    end = max(start, end)
+    if start > 0 or end < len(index):
+        df.drop(index[:start].append(index[end:]), inplace=True)
 
 
 def filter_series_by_value(df, col, value):
@@ -17,8 +17,12 @@
 """
 Functions for converting strings to QuantLib objects. Used to map attributes stored in the database to objects.
 """
+import sys
+from datetime import date as ddate
+from functools import lru_cache
 import pandas as pd
 import QuantLib as ql
+from tsfin.base.basetools import QL_EPOCH_SERIAL
 
 
 def to_ql_date(arg):
@@ -35,9 +39,98 @@ def to_ql_date(arg):
     """
     if isinstance(arg, ql.Date):
         return arg
-    else:
+    if getattr(arg, 'tzinfo', None) is not None:
+        # Equal timezone aware dates may fall on different days, so they can't share a cache entry.
+        return _convert_ql_date(arg)
+    try:
+        return _cached_ql_date(arg)
+    except TypeError:
+        # Unhashable argument, can't be cached.
+        return _convert_ql_date(arg)
+
+
+def _convert_ql_date(arg):
+    if not isinstance(arg, ddate):
+        # datetime.date, datetime.datetime and pandas.Timestamp don't need to go through the pandas parser.
         arg = pd.to_datetime(arg)
-        return ql.Date(arg.day, arg.month, arg.year)
+    return ql.Date(arg.day, arg.month, arg.year)
+
+
+# The same dates are converted over and over, e.g. the index of a time series at each call with it.
+_cached_ql_date = lru_cache(maxsize=65536)(_convert_ql_date)
+
+
+_serial_ql_date = lru_cache(maxsize=65536)(ql.Date)
+
+
+def to_ql_dates(arg):
+    """Converts a sequence of dates (e.g. a pandas.DatetimeIndex) to a list of ql.Date instances.
+
+    The dates are converted to QuantLib serial numbers in a single numpy operation, instead of going through one
+    pandas.Timestamp per date.
+
+    Parameters
+    ----------
+    arg: list-like of date-like
+
+    Returns
+    -------
+    list of QuantLib.Date
+
+    """
+    index = pd.DatetimeIndex(arg)
+    if index.tz is not None:
+        # Use the local dates, the same as to_ql_date.
+        index = index.tz_localize(None)
+    serials = index.to_numpy(dtype='datetime64[D]').view('int64') + QL_EPOCH_SERIAL
+    return list(map(_serial_ql_date, serials.tolist()))
+
+
+# Upper-cased and interned versions of the strings given to the converters, to use as keys in their tables.
+_keys = dict()
+
+
+def _key(arg):
+    try:
+        return _keys[arg]
+    except KeyError:
+        key = _keys[arg] = sys.intern(arg.upper())
+        return key
+
+
+def _lookup(table, arg, description):
+    """Value of `arg` in one of the converter tables, raising ValueError if there is none.
+    """
+    try:
+        return table[_key(arg)]
+    except KeyError:
+        raise ValueError("Unable to convert {0} to a QuantLib {1}".format(arg, description))
+
+
+# Instances built from the tables of immutable QuantLib objects (calendars, currencies and day counters), to be
+# shared by every caller instead of being built again on each call.
+_instances = dict()
+
+
+def _instance(table, arg, description):
+    """Instance built by the factory of `arg` in `table`, created on first use.
+    """
+    try:
+        return _instances[(description, _key(arg))]
+    except KeyError:
+        instance = _lookup(table, arg, description)()
+        _instances[(description, _key(arg))] = instance
+        return instance
+
+
+_FREQUENCIES = {
+    "ANNUAL": ql.Annual,
+    "SEMIANNUAL": ql.Semiannual,
+    "QUARTERLY": ql.Quarterly,
+    "BIMONTHLY": ql.Bimonthly,
+    "MONTHLY": ql.Monthly,
+    "AT_MATURITY": ql.Once,
+}
 
 
 def to_ql_frequency(arg):
@@ -52,21 +145,17 @@ def to_ql_frequency(arg):
     QuantLib.Period
 
     """
+    return _lookup(_FREQUENCIES, arg, "frequency")
+
 
-    if arg.upper() == "ANNUAL":
-        return ql.Annual
-    elif arg.upper() == "SEMIANNUAL":
-        return ql.Semiannual
-    elif arg.upper() == "QUARTERLY":
-        return ql.Quarterly
-    elif arg.upper() == "BIMONTHLY":
-        return ql.Bimonthly
-    elif arg.upper() == "MONTHLY":
-        return ql.Monthly
-    elif arg.upper() == "AT_MATURITY":
-        return ql.Once
-    else:
-        raise ValueError("Unable to convert {} to a QuantLib frequency".format(arg))
+_CALENDARS = {
+    "NYSE": lambda: ql.UnitedStates(ql.UnitedStates.NYSE),
+    "US": lambda: ql.UnitedStates(),
+    "UK": lambda: ql.UnitedKingdom(),
+    "BZ": lambda: ql.Brazil(),
+    "TARGET": lambda: ql.TARGET(),
+    "FD": lambda: ql.UnitedStates(ql.UnitedStates.FederalReserve),
+}
 
 
 def to_ql_calendar(arg):
@@ -81,21 +170,14 @@ def to_ql_calendar(arg):
     QuantLib.Calendar
 
     """
+    return _instance(_CALENDARS, arg, "calendar")
+
 
-    if arg.upper() == "NYSE":
-        return ql.UnitedStates(ql.UnitedStates.NYSE)
-    if arg.upper() == "US":
-        return ql.UnitedStates()
-    if arg.upper() == "UK":
-        return ql.UnitedKingdom()
-    if arg.upper() == "BZ":
-        return ql.Brazil()
-    if arg.upper() == "TARGET":
-        return ql.TARGET()
-    if arg.upper() == "FD":
-        return ql.UnitedStates(ql.UnitedStates.FederalReserve)
-    else:
-        raise ValueError("Unable to convert {} to a QuantLib calendar".format(arg))
+_CURRENCIES = {
+    "USD": lambda: ql.USDCurrency(),
+    "BRL": lambda: ql.BRLCurrency(),
+    "EUR": lambda: ql.EURCurrency(),
+}
 
 
 def to_ql_currency(arg):
@@ -110,15 +192,14 @@ def to_ql_currency(arg):
     QuantLib.Currency
 
     """
+    return _instance(_CURRENCIES, arg, "currency")
 
-    if arg.upper() == "USD":
-        return ql.USDCurrency()
-    if arg.upper() == "BRL":
-        return ql.BRLCurrency()
-    if arg.upper() == "EUR":
-        return ql.EURCurrency()
-    else:
-        raise ValueError("Unable to convert {} to a QuantLib currency".format(arg))
+
+_BUSINESS_CONVENTIONS = {
+    "FOLLOWING": ql.Following,
+    "MODIFIEDFOLLOWING": ql.ModifiedFollowing,
+    "UNADJUSTED": ql.Unadjusted,
+}
 
 
 def to_ql_business_convention(arg):
@@ -133,15 +214,19 @@ def to_ql_business_convention(arg):
     QuantLib.BusinessConvention
 
     """
+    return _lookup(_BUSINESS_CONVENTIONS, arg, "business convention")
+
 
-    if arg.upper() == "FOLLOWING":
-        return ql.Following
-    elif arg.upper() == "MODIFIEDFOLLOWING":
-        return ql.ModifiedFollowing
-    elif arg.upper() == "UNADJUSTED":
-        return ql.Unadjusted
-    else:
-        raise ValueError("Unable to convert {} to a QuantLib business convention".format(arg))
+_DAY_COUNTERS = {
+    "THIRTY360E": lambda: ql.Thirty360(ql.Thirty360.European),
+    "THIRTY360": lambda: ql.Thirty360(),
+    "ACTUAL360": lambda: ql.Actual360(),
+    "ACTUAL365": lambda: ql.Actual365Fixed(),
+    "ACTUALACTUAL": lambda: ql.ActualActual(ql.ActualActual.ISMA),
+    "ACTUALACTUALISMA": lambda: ql.ActualActual(ql.ActualActual.ISMA),
+    "ACTUALACTUALISDA": lambda: ql.ActualActual(ql.ActualActual.ISDA),
+    "BUSINESS252": lambda: ql.Business252(),
+}
 
 
 def to_ql_day_counter(arg):
@@ -156,24 +241,16 @@ def to_ql_day_counter(arg):
     QuantLib.DayCounter
 
     """
-    if arg.upper() == "THIRTY360E":
-        return ql.Thirty360(ql.Thirty360.European)
-    elif arg.upper() == "THIRTY360":
-        return ql.Thirty360()
-    elif arg.upper() == "ACTUAL360":
-        return ql.Actual360()
-    elif arg.upper() == "ACTUAL365":
-        return ql.Actual365Fixed()
-    elif arg.upper() == "ACTUALACTUAL":
-        return ql.ActualActual(ql.ActualActual.ISMA)
-    elif arg.upper() == "ACTUALACTUALISMA":
-        return ql.ActualActual(ql.ActualActual.ISMA)
-    elif arg.upper() == "ACTUALACTUALISDA":
-        return ql.ActualActual(ql.ActualActual.ISDA)
-    elif arg.upper() == "BUSINESS252":
-        return ql.Business252()
-    else:
-        raise ValueError("Unable to convert {} to a QuantLib day counter".format(arg))
+    return _instance(_DAY_COUNTERS, arg, "day counter")
+
+
+_DATE_GENERATIONS = {
+    "FORWARD": ql.DateGeneration.Forward,
+    "BACKWARD": ql.DateGeneration.Backward,
+    "CDS20IMM": ql.DateGeneration.TwentiethIMM,
+    "CDS2015": ql.DateGeneration.CDS2015,
+    "CDS": ql.DateGeneration.CDS,
+}
 
 
 def to_ql_date_generation(arg):
@@ -188,18 +265,14 @@ def to_ql_date_generation(arg):
     QuantLib.DateGeneration
 
     """
-    if arg.upper() == "FORWARD":
-        return ql.DateGeneration.Forward
-    elif arg.upper() == "BACKWARD":
-        return ql.DateGeneration.Backward
-    elif arg.upper() == "CDS20IMM":
-        return ql.DateGeneration.TwentiethIMM
-    elif arg.upper() == "CDS2015":
-        return ql.DateGeneration.CDS2015
-    elif arg.upper() == "CDS":
-        return ql.DateGeneration.CDS
-    else:
-        raise ValueError("Unable to convert {} to a QuantLib date generation specification".format(arg))
+    return _lookup(_DATE_GENERATIONS, arg, "date generation specification")
+
+
+_COMPOUNDINGS = {
+    "COMPOUNDED": ql.Compounded,
+    "SIMPLE": ql.Simple,
+    "CONTINUOUS": ql.Continuous,
+}
 
 
 def to_ql_compounding(arg):
@@ -214,14 +287,13 @@ def to_ql_compounding(arg):
     QuantLib.Compounding
 
     """
-    if arg.upper() == "COMPOUNDED":
-        return ql.Compounded
-    elif arg.upper() == "SIMPLE":
-        return ql.Simple
-    elif arg.upper() == "CONTINUOUS":
-        return ql.Continuous
-    else:
-        raise ValueError("Unable to convert {} to a QuantLib compounding specification".format(arg))
+    return _lookup(_COMPOUNDINGS, arg, "compounding specification")
+
+
+_INDICES = {
+    "USDLIBOR": lambda: ql.USDLibor,
+    "FEDFUNDS": lambda: ql.FedFunds(),
+}
 
 
 def to_ql_index(arg):
@@ -236,12 +308,13 @@ def to_ql_index(arg):
     QuantLib.Index
 
     """
-    if arg.upper() == "USDLIBOR":
-        return ql.USDLibor
-    elif arg.upper() == "FEDFUNDS":
-        return ql.FedFunds()
-    else:
-        raise ValueError("Unable to convert {} to a QuantLib index".format(arg))
+    # Indices are not shared, since they are linked to term structures.
+    return _lookup(_INDICES, arg, "index")()
+
+
+_OVERNIGHT_INDICES = {
+    "FEDFUNDS": lambda: ql.FedFunds(),
+}
 
 
 def to_ql_overnight_index(arg):
@@ -256,18 +329,24 @@ def to_ql_overnight_index(arg):
     QuantLib.OvernightIndex
 
     """
-    if arg.upper() == "FEDFUNDS":
-        return ql.FedFunds()
-    else:
-        raise ValueError("Unable to convert {} to a QuantLib overnight index".format(arg))
+    return _lookup(_OVERNIGHT_INDICES, arg, "overnight index")()
+
+
+_OPTION_TYPES = {
+    "CALL": ql.Option.Call,
+    "PUT": ql.Option.Put,
+}
 
 
 def to_ql_option_type(arg):
 
-    if arg.upper() == 'CALL':
-        return ql.Option.Call
-    elif arg.upper() == 'PUT':
-        return ql.Option.Put
+    return _lookup(_OPTION_TYPES, arg, "option type")
+
+
+_RATE_INDICES = {
+    "USDLIBOR": ql.USDLibor,
+    "FEDFUNDS": ql.FedFunds,
+}
 
 
 def to_ql_rate_index(arg, *args):
@@ -283,18 +362,7 @@ def to_ql_rate_index(arg, *args):
     QuantLib.Index
 
     """
-    if arg.upper() == "USDLIBOR":
-        if len(args) > 0:
-            return ql.USDLibor(*args)
-        else:
-            return ql.USDLibor()
-    elif arg.upper() == "FEDFUNDS":
-        if len(args) > 0:
-            return ql.FedFunds(*args)
-        else:
-            return ql.FedFunds()
-    else:
-        raise ValueError("Unable to convert {} to a QuantLib index".format(arg))
+    return _lookup(_RATE_INDICES, arg, "index")(*args)
 
 
 def to_ql_quote_handle(arg):
@@ -302,22 +370,21 @@ def to_ql_quote_handle(arg):
     return ql.QuoteHandle(ql.SimpleQuote(arg))
 
 
+_DURATIONS = {
+    "MODIFIED": ql.Duration.Modified,
+    "SIMPLE": ql.Duration.Simple,
+    "MACAULAY": ql.Duration.Macaulay,
+}
+
+
 def to_ql_duration(arg):
 
-    if arg.upper() == 'MODIFIED':
-        return ql.Duration.Modified
-    if arg.upper() == 'SIMPLE':
-        return ql.Duration.Simple
-    else:
-        return ql.Duration.Macaulay
+    return _DURATIONS.get(_key(arg), ql.Duration.Macaulay)
 
 
 def to_ql_float_index(index, tenor, yield_curve_handle=None):
 
-    if index.upper() == "USDLIBOR":
-        return ql.USDLibor(tenor, yield_curve_handle)
-    elif index.upper() == "FEDFUNDS":
-        return ql.FedFunds(tenor, yield_curve_handle)
+    return _lookup(_RATE_INDICES, index, "index")(tenor, yield_curve_handle)
 
 
 def to_ql_ibor_index(index, tenor, fixing_days, currency, calendar, business_convention, end_of_month, day_counter,
@@ -327,11 +394,13 @@ def to_ql_ibor_index(index, tenor, fixing_days, currency, calendar, business_con
                         yield_curve_handle)
 
 
+_SHORT_RATE_MODELS = {
+    "HULL_WHITE": ql.HullWhite,
+    "BLACK_KARASINSKI": ql.BlackKarasinski,
+    "G2": ql.G2,
+}
+
+
 def to_ql_short_rate_model(arg):
 
-    if arg.upper() == 'HULL_WHITE':
-        return ql.HullWhite
-    elif arg.upper() == 'BLACK_KARASINSKI':
-        return ql.BlackKarasinski
-    elif arg.upper() == 'G2':
-        return ql.G2
+    return _lookup(_SHORT_RATE_MODELS, arg, "short rate model")
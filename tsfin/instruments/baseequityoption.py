@@ -19,19 +19,36 @@ A class for modelling Equity Options
 """
 import QuantLib as ql
 import numpy as np
+from scipy.special import ndtr
 from tsfin.constants import CALENDAR, MATURITY_DATE, \
     DAY_COUNTER, EXERCISE_TYPE, OPTION_TYPE, STRIKE_PRICE, UNDERLYING_INSTRUMENT, OPTION_CONTRACT_SIZE
 from tsfin.base import Instrument, to_ql_option_type, to_ql_date, conditional_vectorize, to_ql_calendar, \
     to_ql_day_counter, to_datetime
 
 
+_EXERCISE_TYPES = {
+    'AMERICAN': lambda date, maturity: ql.AmericanExercise(to_ql_date(date), to_ql_date(maturity)),
+    'EUROPEAN': lambda date, maturity: ql.EuropeanExercise(to_ql_date(maturity)),
+}
+
+
 def option_exercise_type(exercise_type, date, maturity):
-    if exercise_type.upper() == 'AMERICAN':
-        return ql.AmericanExercise(to_ql_date(date), to_ql_date(maturity))
-    elif exercise_type.upper() == 'EUROPEAN':
-        return ql.EuropeanExercise(to_ql_date(maturity))
-    else:
+    try:
+        build_exercise = _EXERCISE_TYPES[exercise_type.upper()]
+    except KeyError:
         raise ValueError('Exercise type not supported')
+    return build_exercise(date, maturity)
+
+
+def _set_eval_date(date):
+    """Set the QuantLib evaluation date to `date` if it is not already there.
+
+    Every assignment notifies all the observers of the evaluation date, even if the date doesn't change. The current
+    value is read back instead of remembered because other modules set the evaluation date too.
+    """
+    settings = ql.Settings.instance()
+    if settings.evaluationDate != date:
+        settings.evaluationDate = date
 
 
 def ql_option_type(*args):
@@ -44,13 +61,68 @@ def ql_option_payoff(*args):
     return ql.PlainVanillaPayoff(*args)
 
 
-def ql_option_engine(process):
+def ql_option_engine(process, time_steps=801):
 
     model = str("LR")
-    time_steps = 801
     return ql.BinomialVanillaEngine(process, model, time_steps)
 
 
+def _price_bounds(discounted_forward, discounted_strike, is_call):
+    """No-arbitrage bounds of European option prices, for scalars or arrays.
+
+    :param discounted_forward: float or numpy.ndarray
+        The underlying forward discounted to the date, i.e. the spot net of dividends.
+    :param discounted_strike: float or numpy.ndarray
+        The strike discounted to the date.
+    :param is_call: bool
+        Whether the options are calls.
+    :return: tuple
+        The lower and upper bounds.
+    """
+    if is_call:
+        return np.maximum(discounted_forward - discounted_strike, 0), discounted_forward
+    return np.maximum(discounted_strike - discounted_forward, 0), discounted_strike
+
+
+_INV_SQRT_2PI = 1 / np.sqrt(2 * np.pi)
+
+
+def black_scholes_price_vega(forward, strike, discount, time, volatility, is_call):
+    """ Black Scholes price and vega of European options, broadcasting over array arguments.
+
+    :param forward: float
+        The forward price of the underlying at the option maturity.
+    :param strike: float or numpy.ndarray
+        The option strikes.
+    :param discount: float
+        The risk free discount factor to the option maturity.
+    :param time: float
+        The time to maturity, in years.
+    :param volatility: float or numpy.ndarray
+        The volatilities.
+    :param is_call: bool
+        Whether the options are calls (or puts).
+    :return: tuple of numpy.ndarray
+        The option prices and vegas.
+    """
+    return _black_scholes_kernel(np.log(forward / strike), discount * forward, discount * strike, np.sqrt(time),
+                                 volatility, is_call)
+
+
+def _black_scholes_kernel(log_moneyness, discounted_forward, discounted_strike, sqrt_time, volatility, is_call):
+    """ Black Scholes price and vega from the terms that don't depend on the volatility, computed in a single pass.
+    """
+    std_dev = volatility * sqrt_time
+    d1 = log_moneyness / std_dev + 0.5 * std_dev
+    d2 = d1 - std_dev
+    if is_call:
+        price = discounted_forward * ndtr(d1) - discounted_strike * ndtr(d2)
+    else:
+        price = discounted_strike * ndtr(-d2) - discounted_forward * ndtr(-d1)
+    vega = discounted_forward * sqrt_time * _INV_SQRT_2PI * np.exp(-0.5 * d1 * d1)
+    return price, vega
+
+
 class BaseEquityOption(Instrument):
     """ Model for Equity Options using the Black Scholes Merton model.
 
@@ -58,13 +130,16 @@ class BaseEquityOption(Instrument):
         The TimeSeries representing the option.
     :param ql_process: :py:class:'BlackScholesMerton'
         A class used to handle the Black Scholes Merton model from QuantLib.
+    :param engine_steps: int, optional
+        The number of time steps of the binomial tree used to evaluate the option. Default: 252 steps per year to
+        maturity, kept odd and between 101 and 401.
 
     Note
     ----
     See the :py:mod:`constants` for required attributes in `timeseries` and their possible values.
     """
 
-    def __init__(self, timeseries, ql_process):
+    def __init__(self, timeseries, ql_process, engine_steps=None):
         super().__init__(timeseries)
         self.opt_type = self.ts_attributes[OPTION_TYPE]
         self.strike = self.ts_attributes[STRIKE_PRICE]
@@ -76,7 +151,25 @@ class BaseEquityOption(Instrument):
         self.exercise_type = self.ts_attributes[EXERCISE_TYPE]
         self.underlying_instrument = self.ts_attributes[UNDERLYING_INSTRUMENT]
         self.ql_process = ql_process
-        self.option = None
+        # VanillaOptions built by ql_option, by exercise type and exercise start date, of the last date used only.
+        self._ql_options = dict()
+        self.engine_steps = engine_steps
+        # Pricing engines on self.ql_process.bsm_process by number of steps, and the engine of each option, see
+        # _set_pricing_engine.
+        self._engine_process = None
+        self._engines = dict()
+        self._engine_options = dict()
+
+    @property
+    def exercise_type(self):
+        return self._exercise_type
+
+    @exercise_type.setter
+    def exercise_type(self, exercise_type):
+        # Resolve the exercise builder once, instead of comparing strings on every ql_option call.
+        self._exercise_type = exercise_type
+        self._exercise_key = exercise_type.upper()
+        self._build_exercise = _EXERCISE_TYPES.get(self._exercise_key)
 
     def is_expired(self, date, *args, **kwargs):
         """
@@ -210,9 +303,64 @@ class BaseEquityOption(Instrument):
         if exercise_ovrd is not None:
             self.exercise_type = exercise_ovrd.upper()
 
-        exercise = option_exercise_type(self.exercise_type, date=date, maturity=self.option_maturity)
+        if self._build_exercise is None:
+            raise ValueError('Exercise type not supported')
+        # European exercises don't depend on the date, so the same option is used for every date.
+        key = (self._exercise_key, None if self._exercise_key == 'EUROPEAN' else to_ql_date(date))
+        option = self._ql_options.get(key)
+        if option is None:
+            if key[1] is not None:
+                # Keep only the option of the last date used of each exercise type, every cached option observes the
+                # process and would be notified of its changes.
+                for old_key in [old_key for old_key in self._ql_options if old_key[0] == key[0]]:
+                    self._forget_option(old_key)
+            option = ql_option_type(self.payoff, self._build_exercise(date, self.option_maturity))
+            self._ql_options[key] = option
+        return option
 
-        return ql_option_type(self.payoff, exercise)
+    def _forget_option(self, key):
+        """
+        :param key: tuple
+            The key in ``self._ql_options`` of the option to be dropped, along with its engine entry.
+        """
+        self._engine_options.pop(id(self._ql_options.pop(key)), None)
+
+    def _tree_steps(self, date):
+        """
+        :param date: date-like
+            The date.
+        :return: int
+            The number of steps of the binomial tree, ``self.engine_steps`` or, if None, 252 steps per year to maturity
+            kept odd and between 101 and 401. The Leisen-Reimer tree converges fast enough that short dated options
+            don't need as many steps as long dated ones.
+        """
+        if self.engine_steps is not None:
+            return self.engine_steps
+        time = self.day_counter.yearFraction(to_ql_date(date), self.option_maturity)
+        return min(401, max(101, int(252 * time))) | 1
+
+    def _set_pricing_engine(self, option, date):
+        """
+        :param option: QuantLib.VanillaOption
+            The option to be priced with the binomial engine of ``self.ql_process``.
+        :param date: date-like
+            The date, used to choose the number of steps of the tree.
+
+        The engines observe the process, so each one is built only once and options keep them, being repriced only
+        when the process changes.
+        """
+        process = self.ql_process.bsm_process
+        if process is not self._engine_process:
+            self._engine_process = process
+            self._engines = dict()
+            self._engine_options = dict()
+        steps = self._tree_steps(date)
+        engine = self._engines.get(steps)
+        if engine is None:
+            engine = self._engines[steps] = ql_option_engine(process, steps)
+        if self._engine_options.get(id(option), (None, None))[1] is not engine:
+            option.setPricingEngine(engine)
+            self._engine_options[id(option)] = (option, engine)
 
     @conditional_vectorize('date')
     def option_engine(self, date, vol_last_available=False, dvd_tax_adjust=1, last_available=True, exercise_ovrd=None):
@@ -234,7 +382,7 @@ class BaseEquityOption(Instrument):
             and greeks.
         """
         dt_date = to_datetime(date)
-        self.option = self.ql_option(date=dt_date, exercise_ovrd=exercise_ovrd)
+        option = self.ql_option(date=dt_date, exercise_ovrd=exercise_ovrd)
         vol_updated = self.ql_process.update_process(date=date, calendar=self.calendar,
                                                      day_counter=self.day_counter,
                                                      ts_option=self.timeseries,
@@ -244,21 +392,45 @@ class BaseEquityOption(Instrument):
                                                      dvd_tax_adjust=dvd_tax_adjust,
                                                      last_available=last_available)
 
-        self.option.setPricingEngine(ql_option_engine(self.ql_process.bsm_process))
+        self._set_pricing_engine(option, date)
 
         if vol_updated:
-            return self.option
+            return option
         else:
             self.ql_process.volatility_update(date=date, calendar=self.calendar, day_counter=self.day_counter,
                                               ts_option=self.timeseries, underlying_name=self.underlying_instrument,
                                               vol_value=0.2)
             mid_price = self.px_mid.get_values(index=dt_date, last_available=True)
-            implied_vol = self.option.impliedVolatility(targetValue=mid_price, process=self.ql_process.bsm_process)
+            implied_vol = option.impliedVolatility(mid_price, self.ql_process.bsm_process)
             self.ql_process.volatility_update(date=date, calendar=self.calendar, day_counter=self.day_counter,
                                               ts_option=self.timeseries, underlying_name=self.underlying_instrument,
                                               vol_value=implied_vol)
-            self.option.setPricingEngine(ql_option_engine(self.ql_process.bsm_process))
-            return self.option
+            return option
+
+    def _prepare(self, date, base_date, vol_last_available=False, dvd_tax_adjust=1, last_available=True,
+                 exercise_ovrd=None):
+        """
+        :param date: date-like
+            The date.
+        :param base_date: date-like
+            When date is a future date base_date is the last date on the "present" used to estimate future values.
+        :param vol_last_available: bool, optional
+            Whether to use last available data in case dates are missing in volatility values.
+        :param dvd_tax_adjust: float, default=1
+            The multiplier used to adjust for dividend tax. For example, US dividend taxes are 30% so you pass 0.7.
+        :param last_available: bool, optional
+            Whether to use last available data in case dates are missing in ``quotes``.
+        :param exercise_ovrd: str, optional
+            Used to force the option model to use a specific type of option. Only working for American and European
+            option types.
+        :return: QuantLib.VanillaOption
+            The option with its engine, evaluated at date, or at base_date if date is after it.
+        """
+        if to_datetime(date) > to_datetime(base_date):
+            date = base_date
+        option = self.option_engine(date=date, vol_last_available=vol_last_available, dvd_tax_adjust=dvd_tax_adjust,
+                                    last_available=last_available, exercise_ovrd=exercise_ovrd)
+        return option
 
     @conditional_vectorize('date')
     def price(self, date, base_date, vol_last_available=False, dvd_tax_adjust=1, last_available=True,
@@ -280,7 +452,7 @@ class BaseEquityOption(Instrument):
         :return: float
             The option price at date.
         """
-        ql.Settings.instance().evaluationDate = to_ql_date(date)
+        _set_eval_date(to_ql_date(date))
         dt_maturity = to_datetime(self.option_maturity)
         if to_datetime(date) >= dt_maturity:
             if dt_maturity > to_datetime(base_date):
@@ -288,14 +460,9 @@ class BaseEquityOption(Instrument):
             else:
                 return self.intrinsic(date=dt_maturity)
         else:
-            if to_datetime(date) > to_datetime(base_date):
-                option = self.option_engine(date=base_date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
-            else:
-                option = self.option_engine(date=date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust,  last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
+            option = self._prepare(date=date, base_date=base_date, vol_last_available=vol_last_available,
+                                   dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
+                                   exercise_ovrd=exercise_ovrd)
         return option.NPV()
 
     @conditional_vectorize('date', 'spot_price')
@@ -320,18 +487,13 @@ class BaseEquityOption(Instrument):
         :return: float
             The option price based on the date and underlying spot price.
         """
-        ql.Settings.instance().evaluationDate = to_ql_date(date)
-        if to_datetime(date) > to_datetime(base_date):
-            option = self.option_engine(date=base_date, vol_last_available=vol_last_available,
-                                        dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                        exercise_ovrd=exercise_ovrd)
-        else:
-            option = self.option_engine(date=date, vol_last_available=vol_last_available,
-                                        dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                        exercise_ovrd=exercise_ovrd)
+        _set_eval_date(to_ql_date(date))
+        option = self._prepare(date=date, base_date=base_date, vol_last_available=vol_last_available,
+                               dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
+                               exercise_ovrd=exercise_ovrd)
 
+        # The option observes the spot quote through its engine, so it is repriced with the new spot.
         self.ql_process.spot_price_update(date=date, underlying_name=self.underlying_instrument, spot_price=spot_price)
-        self.option.setPricingEngine(ql_option_engine(self.ql_process.bsm_process))
         return option.NPV()
 
     @conditional_vectorize('date')
@@ -354,7 +516,7 @@ class BaseEquityOption(Instrument):
         :return: float
             The option delta at date.
         """
-        ql.Settings.instance().evaluationDate = to_ql_date(date)
+        _set_eval_date(to_ql_date(date))
         dt_maturity = to_datetime(self.option_maturity)
         if to_datetime(date) >= dt_maturity:
             if self.intrinsic(date=dt_maturity) > 0:
@@ -362,14 +524,9 @@ class BaseEquityOption(Instrument):
             else:
                 return 0
         else:
-            if to_datetime(date) > to_datetime(base_date):
-                option = self.option_engine(date=base_date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
-            else:
-                option = self.option_engine(date=date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
+            option = self._prepare(date=date, base_date=base_date, vol_last_available=vol_last_available,
+                                   dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
+                                   exercise_ovrd=exercise_ovrd)
             return option.delta()
 
     @conditional_vectorize('date', 'spot_price')
@@ -394,18 +551,13 @@ class BaseEquityOption(Instrument):
         :return: float
             The option delta based on the date and underlying spot price.
         """
-        ql.Settings.instance().evaluationDate = to_ql_date(date)
-        if to_datetime(date) > to_datetime(base_date):
-            option = self.option_engine(date=base_date, vol_last_available=vol_last_available,
-                                        dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                        exercise_ovrd=exercise_ovrd)
-        else:
-            option = self.option_engine(date=date, vol_last_available=vol_last_available,
-                                        dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                        exercise_ovrd=exercise_ovrd)
+        _set_eval_date(to_ql_date(date))
+        option = self._prepare(date=date, base_date=base_date, vol_last_available=vol_last_available,
+                               dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
+                               exercise_ovrd=exercise_ovrd)
 
+        # The option observes the spot quote through its engine, so it is repriced with the new spot.
         self.ql_process.spot_price_update(date=date, underlying_name=self.underlying_instrument, spot_price=spot_price)
-        self.option.setPricingEngine(ql_option_engine(self.ql_process.bsm_process))
         return option.delta()
 
     @conditional_vectorize('date')
@@ -428,19 +580,14 @@ class BaseEquityOption(Instrument):
         :return: float
             The option gamma at date.
         """
-        ql.Settings.instance().evaluationDate = to_ql_date(date)
+        _set_eval_date(to_ql_date(date))
         dt_maturity = to_datetime(self.option_maturity)
         if to_datetime(date) >= dt_maturity:
             return 0
         else:
-            if to_datetime(date) > to_datetime(base_date):
-                option = self.option_engine(date=base_date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
-            else:
-                option = self.option_engine(date=date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
+            option = self._prepare(date=date, base_date=base_date, vol_last_available=vol_last_available,
+                                   dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
+                                   exercise_ovrd=exercise_ovrd)
             return option.gamma()
 
     @conditional_vectorize('date')
@@ -463,19 +610,14 @@ class BaseEquityOption(Instrument):
         :return: float
             The option theta at date.
         """
-        ql.Settings.instance().evaluationDate = to_ql_date(date)
+        _set_eval_date(to_ql_date(date))
         dt_maturity = to_datetime(self.option_maturity)
         if to_datetime(date) >= dt_maturity:
             return 0
         else:
-            if to_datetime(date) > to_datetime(base_date):
-                option = self.option_engine(date=base_date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
-            else:
-                option = self.option_engine(date=date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
+            option = self._prepare(date=date, base_date=base_date, vol_last_available=vol_last_available,
+                                   dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
+                                   exercise_ovrd=exercise_ovrd)
             return option.theta()
 
     @conditional_vectorize('date')
@@ -498,27 +640,48 @@ class BaseEquityOption(Instrument):
         :return: float
             The option vega at date.
         """
-        ql.Settings.instance().evaluationDate = to_ql_date(date)
+        _set_eval_date(to_ql_date(date))
         dt_maturity = to_datetime(self.option_maturity)
         if to_datetime(date) >= dt_maturity:
             return 0
         else:
-            if to_datetime(date) > to_datetime(base_date):
-                option = self.option_engine(date=base_date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
-            else:
-                option = self.option_engine(date=date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
-            if self.exercise_type == 'AMERICAN':
-                return None
+            option = self._prepare(date=date, base_date=base_date, vol_last_available=vol_last_available,
+                                   dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
+                                   exercise_ovrd=exercise_ovrd)
+            if self._exercise_key == 'AMERICAN':
+                return self._finite_difference_vega(option, min(to_datetime(date), to_datetime(base_date)))
             else:
                 try:
                     return option.vega()
                 except:
                     return 0
 
+    def _finite_difference_vega(self, option, date, bump=1e-4):
+        """
+        :param option: QuantLib.VanillaOption
+            The option, with its engine on ``self.ql_process``.
+        :param date: date-like
+            The date the process is evaluated at.
+        :param bump: float, default=1e-4
+            The volatility bump.
+        :return: float
+            The central difference of the option NPV with the volatility bumped up and down, in the same units as
+            the analytic vega of European options. The engines don't provide vega for American options.
+        """
+        volatility = self.ql_process.bsm_process.blackVolatility().blackVol(self.option_maturity, self.strike)
+        vol_updated = self.ql_process.vol_updated[self.underlying_instrument]
+        ql_date = to_ql_date(date)
+        was_updated = vol_updated[ql_date]
+        npvs = list()
+        for vol_value in (volatility + bump, volatility - bump, volatility):
+            self.ql_process.volatility_update(date=date, calendar=self.calendar, day_counter=self.day_counter,
+                                              ts_option=self.timeseries, underlying_name=self.underlying_instrument,
+                                              vol_value=vol_value)
+            npvs.append(option.NPV())
+        # Restoring the volatility shouldn't mark a volatility implied from the price as updated.
+        vol_updated[ql_date] = was_updated
+        return (npvs[0] - npvs[1]) / (2 * bump)
+
     @conditional_vectorize('date')
     def rho(self, date, base_date, vol_last_available=False, dvd_tax_adjust=1, last_available=True, exercise_ovrd=None):
         """
@@ -538,20 +701,15 @@ class BaseEquityOption(Instrument):
         :return: float
             The option rho at date.
         """
-        ql.Settings.instance().evaluationDate = to_ql_date(date)
+        _set_eval_date(to_ql_date(date))
         dt_maturity = to_datetime(self.option_maturity)
         if to_datetime(date) >= dt_maturity:
             return 0
         else:
-            if to_datetime(date) > to_datetime(base_date):
-                option = self.option_engine(date=base_date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
-            else:
-                option = self.option_engine(date=date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
-            if self.exercise_type == 'AMERICAN':
+            option = self._prepare(date=date, base_date=base_date, vol_last_available=vol_last_available,
+                                   dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
+                                   exercise_ovrd=exercise_ovrd)
+            if self._exercise_key == 'AMERICAN':
                 return None
             else:
                 try:
@@ -579,25 +737,127 @@ class BaseEquityOption(Instrument):
             Used to force the option model to use a specific type of option. Only working for American and European
             option types.
         :return: float
-            The option volatility based on the option price and date.
+            The option volatility based on the option price and date. NaN if the price is out of the no-arbitrage
+            bounds, where the solver can't find a volatility.
         """
-        if self.option is None:
-            self.option = self.option_engine(date=date, vol_last_available=vol_last_available,
-                                             dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                             exercise_ovrd=exercise_ovrd)
+        option = self.option_engine(date=date, vol_last_available=vol_last_available, dvd_tax_adjust=dvd_tax_adjust,
+                                    last_available=last_available, exercise_ovrd=exercise_ovrd)
 
-        ql.Settings.instance().evaluationDate = to_ql_date(date)
+        _set_eval_date(to_ql_date(date))
         if spot_price is not None:
             self.ql_process.spot_price_update(date=date, underlying_name=self.underlying_instrument,
                                               spot_price=spot_price)
 
+        process = self.ql_process.bsm_process
+        spot = process.x0()
+        is_call = to_ql_option_type(self.opt_type) == ql.Option.Call
+        lower, upper = _price_bounds(spot * process.dividendYield().discount(self.option_maturity),
+                                     self.strike * process.riskFreeRate().discount(self.option_maturity), is_call)
+        if self._exercise_key == 'AMERICAN':
+            # Early exercise is worth at least the intrinsic value, calls at most the spot and puts at most the strike.
+            lower = max(lower, spot - self.strike if is_call else self.strike - spot)
+            upper = spot if is_call else self.strike
+        if not lower + 1e-12 < target < upper - 1e-12:
+            return np.nan
+
         self.ql_process.volatility_update(date=date, calendar=self.calendar, day_counter=self.day_counter,
                                           ts_option=self.timeseries, underlying_name=self.underlying_instrument,
                                           vol_value=0.2)
-        implied_vol = self.option.impliedVolatility(target, self.ql_process.bsm_process)
+        implied_vol = option.impliedVolatility(target, process)
 
         return implied_vol
 
+    def implied_vol_slice(self, date, strikes, prices, vol_last_available=False, dvd_tax_adjust=1,
+                          last_available=True, accuracy=1e-10, max_iterations=100):
+        """ Implied volatilities of European options with the type and maturity of this one, for several strikes.
+
+        All strikes are solved together by Newton steps on the Black Scholes price, falling back to bisection when a
+        step leaves the bracket of the root.
+
+        :param date: date-like
+            The date.
+        :param strikes: array-like
+            The option strikes.
+        :param prices: array-like
+            The option prices, one for each strike.
+        :param vol_last_available: bool, optional
+            Whether to use last available data in case dates are missing in volatility values.
+        :param dvd_tax_adjust: float, default=1
+            The multiplier used to adjust for dividend tax. For example, US dividend taxes are 30% so you pass 0.7.
+        :param last_available: bool, optional
+            Whether to use last available data in case dates are missing in ``quotes``.
+        :param accuracy: float, optional
+            The tolerance of the prices given by the implied volatilities, relative to the discounted forward when it
+            is above 1, and of the width of the volatility bracket.
+        :param max_iterations: int, optional
+            The maximum number of iterations.
+        :return: numpy.ndarray
+            The implied volatilities. NaN where the price is out of the no-arbitrage bounds, the volatility is above 5
+            or the solver didn't converge.
+        """
+        if self._exercise_key != 'EUROPEAN':
+            raise ValueError('Implied volatility slices are only available for European options')
+        ql_date = to_ql_date(date)
+        _set_eval_date(ql_date)
+        self.ql_process.update_process(date=ql_date, calendar=self.calendar, day_counter=self.day_counter,
+                                       ts_option=self.timeseries, maturity=self.option_maturity,
+                                       underlying_name=self.underlying_instrument,
+                                       vol_last_available=vol_last_available, dvd_tax_adjust=dvd_tax_adjust,
+                                       last_available=last_available)
+        process = self.ql_process.bsm_process
+        discount = process.riskFreeRate().discount(self.option_maturity)
+        forward = process.x0() * process.dividendYield().discount(self.option_maturity) / discount
+        time = self.day_counter.yearFraction(ql_date, self.option_maturity)
+        is_call = to_ql_option_type(self.opt_type) == ql.Option.Call
+
+        strikes = np.asarray(strikes, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        shape = np.broadcast(strikes, prices).shape
+        strikes = np.broadcast_to(strikes, shape).ravel()
+        prices = np.broadcast_to(prices, shape).ravel()
+        lower, upper = _price_bounds(discount * forward, discount * strikes, is_call)
+        solvable = (prices > lower) & (prices < upper)
+
+        # The terms that don't depend on the volatility are computed once for the whole slice.
+        log_moneyness = np.log(forward / strikes)
+        discounted_forward = discount * forward
+        discounted_strikes = discount * strikes
+        sqrt_time = np.sqrt(time)
+
+        # Prices are off by rounding errors of about the size of the forward, so the tolerance scales with it.
+        price_accuracy = accuracy * max(1., discounted_forward)
+        min_volatility, max_volatility = 1e-6, 5.0
+        volatility = np.full(strikes.shape, 0.2)
+        low = np.full(strikes.shape, min_volatility)
+        high = np.full(strikes.shape, max_volatility)
+        converged = np.zeros(strikes.shape, dtype=bool)
+        # Indices of the strikes still being solved, only these are priced at each iteration.
+        active = np.flatnonzero(solvable)
+        for _ in range(max_iterations):
+            if not active.size:
+                break
+            active_volatility = volatility[active]
+            price, vega = _black_scholes_kernel(log_moneyness[active], discounted_forward, discounted_strikes[active],
+                                                sqrt_time, active_volatility, is_call)
+            error = price - prices[active]
+            active_high = np.where(error > 0, active_volatility, high[active])
+            active_low = np.where(error < 0, active_volatility, low[active])
+            # A bracket collapsed against one of the volatility limits means the root is out of them.
+            collapsed = active_high - active_low < accuracy
+            inside = (active_low > min_volatility) & (active_high < max_volatility)
+            matched = np.abs(error) < price_accuracy
+            done = matched | collapsed
+            converged[active[matched | (collapsed & inside)]] = True
+            # The price increases with the volatility, so the error sign tells which side of the root we are.
+            high[active] = active_high
+            low[active] = active_low
+            with np.errstate(divide='ignore', invalid='ignore'):
+                newton = active_volatility - error / vega
+            newton = np.where((newton > active_low) & (newton < active_high), newton, 0.5 * (active_low + active_high))
+            volatility[active] = np.where(done, active_volatility, newton)
+            active = active[~done]
+        return np.where(converged, volatility, np.nan).reshape(shape)
+
     @conditional_vectorize('date')
     def optionality(self, date, base_date, vol_last_available=False, dvd_tax_adjust=1, last_available=True,
                     exercise_ovrd=None):
@@ -622,15 +882,10 @@ class BaseEquityOption(Instrument):
         if to_datetime(date) >= dt_maturity:
             return 0
         else:
-            ql.Settings.instance().evaluationDate = to_ql_date(date)
-            if to_datetime(date) > to_datetime(base_date):
-                option = self.option_engine(date=base_date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
-            else:
-                option = self.option_engine(date=date, vol_last_available=vol_last_available,
-                                            dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                            exercise_ovrd=exercise_ovrd)
+            _set_eval_date(to_ql_date(date))
+            option = self._prepare(date=date, base_date=base_date, vol_last_available=vol_last_available,
+                                   dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
+                                   exercise_ovrd=exercise_ovrd)
             price = option.NPV()
             if to_datetime(date) > to_datetime(base_date):
                 intrinsic = self.intrinsic(date=base_date)
@@ -658,20 +913,15 @@ class BaseEquityOption(Instrument):
         :return: float
             The option underlying spot price.
         """
-        ql.Settings.instance().evaluationDate = to_ql_date(date)
+        _set_eval_date(to_ql_date(date))
         dt_maturity = to_datetime(self.option_maturity)
         if to_datetime(date) >= dt_maturity:
             return 0
         else:
-            ql.Settings.instance().evaluationDate = to_ql_date(date)
-            if to_datetime(date) > to_datetime(base_date):
-                self.option_engine(date=base_date, vol_last_available=vol_last_available,
-                                   dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                   exercise_ovrd=exercise_ovrd)
-            else:
-                self.option_engine(date=date, vol_last_available=vol_last_available,
-                                   dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
-                                   exercise_ovrd=exercise_ovrd)
+            _set_eval_date(to_ql_date(date))
+            self._prepare(date=date, base_date=base_date, vol_last_available=vol_last_available,
+                          dvd_tax_adjust=dvd_tax_adjust, last_available=last_available,
+                          exercise_ovrd=exercise_ovrd)
 
             return self.ql_process.spot_price_handle.value()
 
@@ -19,8 +19,7 @@ A class for modelling Black Scholes Merton
 """
 import QuantLib as ql
 import numpy as np
-from collections import OrderedDict
-from tsfin.base import to_ql_date, to_datetime, to_ql_quote_handle
+from tsfin.base import to_ql_date, to_datetime
 
 
 class BlackScholesMerton:
@@ -43,7 +42,43 @@ class BlackScholesMerton:
                                                         self.dividend_handle,
                                                         self.risk_free_handle,
                                                         self.volatility_handle)
-        self.vol_updated = OrderedDict()
+        # Quotes behind the handles. The *_update methods set their values instead of linking new quotes.
+        self._spot_quote = ql.SimpleQuote(0.0)
+        self.spot_price_handle.linkTo(self._spot_quote)
+        # (quote, term structure) pairs, built once for each handle and set of conventions, see _link_structure.
+        self._structures = dict()
+        self._linked_structures = dict()
+        self.vol_updated = dict()
+        # Arguments of the last update_process call, while the handles still hold the state it linked.
+        self._process_key = None
+
+    def _link_structure(self, name, handle, value, conventions, build_structure):
+        """ Link `handle` to a term structure driven by a quote with `value`.
+
+        The term structure is built with ``build_structure(quote_handle)`` only the first time `name` is used with
+        `conventions`. Afterwards its quote is just updated with `value`.
+
+        :param name: str
+            The handle name.
+        :param handle: QuantLib.RelinkableHandle
+            The handle to be linked.
+        :param value: float
+            The quote value.
+        :param conventions: tuple
+            The conventions (calendar, day counter, ...) identifying the term structure.
+        :param build_structure: function
+            Function receiving a QuantLib.QuoteHandle and returning the term structure.
+        """
+        try:
+            quote, structure = self._structures[(name, conventions)]
+            quote.setValue(value)
+        except KeyError:
+            quote = ql.SimpleQuote(value)
+            structure = build_structure(ql.QuoteHandle(quote))
+            self._structures[(name, conventions)] = quote, structure
+        if self._linked_structures.get(name) is not structure:
+            handle.linkTo(structure)
+            self._linked_structures[name] = structure
 
     def spot_price_update(self, date, underlying_name, spot_price=None, last_available=True):
         """
@@ -58,6 +93,7 @@ class BlackScholesMerton:
             Whether to use last available data in case dates are missing in ``quotes``.
         """
 
+        self._process_key = None
         dt_date = to_datetime(date)
         ts_underlying = self.ts_underlying.get(underlying_name).price
         if spot_price is None:
@@ -65,7 +101,7 @@ class BlackScholesMerton:
         else:
             spot_price = spot_price
 
-        self.spot_price_handle.linkTo(ql.SimpleQuote(spot_price))
+        self._spot_quote.setValue(spot_price)
 
     def dividend_yield_update(self, date, calendar, day_counter, underlying_name, dividend_yield=None, dvd_tax_adjust=1,
                               last_available=True, compounding=ql.Continuous):
@@ -88,6 +124,7 @@ class BlackScholesMerton:
         :param compounding: QuantLib.Compounding, default=Continuous
             The compounding used to interpolate the curve.
         """
+        self._process_key = None
         dt_date = to_datetime(date)
         dvd_ts = self.ts_underlying.get(underlying_name).eqy_dvd_yld_12m
         if dividend_yield is None:
@@ -96,8 +133,9 @@ class BlackScholesMerton:
             dividend_yield = dividend_yield
 
         dividend_yield = dividend_yield * dvd_tax_adjust
-        dividend = ql.FlatForward(0, calendar, to_ql_quote_handle(dividend_yield), day_counter, compounding)
-        self.dividend_handle.linkTo(dividend)
+        self._link_structure('dividend', self.dividend_handle, dividend_yield,
+                             (calendar.name(), day_counter.name(), compounding),
+                             lambda quote: ql.FlatForward(0, calendar, quote, day_counter, compounding))
 
     def yield_curve_update(self, date, calendar, day_counter, maturity, risk_free=None, compounding=ql.Continuous,
                            frequency=ql.Once):
@@ -118,7 +156,7 @@ class BlackScholesMerton:
         :param frequency: QuantLib.Frequency, default = Once
             The frequency of the quoted yield.
         """
-
+        self._process_key = None
         ql_date = to_ql_date(date)
         mat_date = to_ql_date(maturity)
         if risk_free is not None:
@@ -126,8 +164,9 @@ class BlackScholesMerton:
         else:
             zero_rate = self.yield_curve.zero_rate_to_date(date=ql_date, to_date=mat_date, compounding=compounding,
                                                            frequency=frequency)
-        yield_curve = ql.FlatForward(0, calendar, to_ql_quote_handle(zero_rate), day_counter, compounding)
-        self.risk_free_handle.linkTo(yield_curve)
+        self._link_structure('risk_free', self.risk_free_handle, zero_rate,
+                             (calendar.name(), day_counter.name(), compounding),
+                             lambda quote: ql.FlatForward(0, calendar, quote, day_counter, compounding))
 
     def volatility_update(self, date, calendar, day_counter, ts_option, underlying_name, vol_value=None,
                           last_available=False):
@@ -150,6 +189,7 @@ class BlackScholesMerton:
             Whether to use last available data in case dates are missing in ``quotes``.
         :return:
         """
+        self._process_key = None
         dt_date = to_datetime(date)
         vol_updated = True
 
@@ -161,8 +201,9 @@ class BlackScholesMerton:
                 volatility_value = 0
                 vol_updated = False
 
-        back_constant_vol = ql.BlackConstantVol(0, calendar, to_ql_quote_handle(volatility_value), day_counter)
-        self.volatility_handle.linkTo(back_constant_vol)
+        self._link_structure('volatility', self.volatility_handle, volatility_value,
+                             (calendar.name(), day_counter.name()),
+                             lambda quote: ql.BlackConstantVol(0, calendar, quote, day_counter))
         self.vol_updated[underlying_name][to_ql_date(date)] = vol_updated
 
     def update_process(self, date, calendar, day_counter, ts_option, maturity, underlying_name,
@@ -190,24 +231,24 @@ class BlackScholesMerton:
         :return: bool
             Return True if the volatility timeseries was updated.
         """
-        self.vol_updated[underlying_name] = OrderedDict()
-        if to_ql_date(date) in self.vol_updated[underlying_name].keys():
-            vol_updated = self.vol_updated[underlying_name][to_ql_date(date)]
-        else:
-            vol_updated = False
+        ql_date = to_ql_date(date)
+        vol_updated = self.vol_updated.setdefault(underlying_name, dict())
+        process_key = (underlying_name, ql_date, calendar, day_counter, id(ts_option), maturity, vol_last_available,
+                       dvd_tax_adjust, last_available, kwargs)
+        if vol_updated.get(ql_date, False) and process_key == self._process_key:
+            # The handles are still linked to the data of this same call.
+            return True
 
-        if vol_updated:
-            return self.vol_updated[underlying_name][to_ql_date(date)]
-        else:
-            self.spot_price_update(date=date, underlying_name=underlying_name, last_available=last_available)
+        self.spot_price_update(date=ql_date, underlying_name=underlying_name, last_available=last_available)
 
-            self.dividend_yield_update(date=date, calendar=calendar, day_counter=day_counter,
-                                       underlying_name=underlying_name, dvd_tax_adjust=dvd_tax_adjust,
-                                       last_available=last_available)
+        self.dividend_yield_update(date=ql_date, calendar=calendar, day_counter=day_counter,
+                                   underlying_name=underlying_name, dvd_tax_adjust=dvd_tax_adjust,
+                                   last_available=last_available)
 
-            self.yield_curve_update(date=date, calendar=calendar, day_counter=day_counter, maturity=maturity, **kwargs)
+        self.yield_curve_update(date=ql_date, calendar=calendar, day_counter=day_counter, maturity=maturity, **kwargs)
 
-            self.volatility_update(date=date, calendar=calendar, day_counter=day_counter, ts_option=ts_option,
-                                   underlying_name=underlying_name, last_available=vol_last_available)
+        self.volatility_update(date=ql_date, calendar=calendar, day_counter=day_counter, ts_option=ts_option,
+                               underlying_name=underlying_name, last_available=vol_last_available)
 
-            return self.vol_updated[underlying_name][to_ql_date(date)]
+        self._process_key = process_key
+        return vol_updated[ql_date]
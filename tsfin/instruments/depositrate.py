@@ -17,13 +17,16 @@
 """
 DepositRate class, to represent deposit rates.
 """
+from functools import reduce
+from operator import mul
 import numpy as np
 import QuantLib as ql
 from tsfin.constants import CALENDAR, TENOR_PERIOD, MATURITY_DATE, BUSINESS_CONVENTION, \
     COMPOUNDING, FREQUENCY, DAY_COUNTER, FIXING_DAYS, QUOTE_TYPE
 from tsfin.base.instrument import default_arguments
-from tsfin.base import Instrument, conditional_vectorize, to_datetime, to_ql_date, to_ql_frequency, \
-    to_ql_business_convention, to_ql_calendar, to_ql_compounding, to_ql_day_counter, to_ql_quote_handle
+from tsfin.base import Instrument, conditional_vectorize, isvectorizable, to_datetime, to_datetime_index, \
+    to_ql_date, to_ql_frequency, to_ql_business_convention, to_ql_calendar, to_ql_compounding, to_ql_day_counter, \
+    to_ql_quote_handle
 
 
 class DepositRate(Instrument):
@@ -39,14 +42,22 @@ class DepositRate(Instrument):
         self.calendar = to_ql_calendar(self.ts_attributes[CALENDAR])
         try:
             self._tenor = ql.PeriodParser.parse(self.ts_attributes[TENOR_PERIOD])
+            self._has_tenor = True
+            self._maturity = None
         except KeyError:
             # If the deposit rate has no tenor, it must have a maturity.
+            self._has_tenor = False
             self._maturity = to_ql_date(to_datetime(self.ts_attributes[MATURITY_DATE]))
         self.day_counter = to_ql_day_counter(self.ts_attributes[DAY_COUNTER])
         self.compounding = to_ql_compounding(self.ts_attributes[COMPOUNDING])
         self.frequency = to_ql_frequency(self.ts_attributes[FREQUENCY])
         self.business_convention = to_ql_business_convention(self.ts_attributes[BUSINESS_CONVENTION])
         self.fixing_days = int(self.ts_attributes[FIXING_DAYS])
+        # Year fractions between reference dates and the maturity of a deposit starting on them.
+        self._tenor_times = dict()
+        # Single rate helper reused at every date by fixed tenor rates, built on first use.
+        self._helper_quote = None
+        self._helper = None
 
     def is_expired(self, date, *args, **kwargs):
         """Check if the deposit rate is expired.
@@ -61,34 +72,46 @@ class DepositRate(Instrument):
         bool
             Whether the instrument is expired at `date`.
         """
-        try:
-            date = to_ql_date(date)
-            if date >= self._maturity:
-                return True
-        except AttributeError:
-            pass
-        return False
+        maturity = getattr(self, '_maturity', None)
+        if maturity is None:
+            return False
+        return to_ql_date(date) >= maturity
 
-    @conditional_vectorize('date')
-    def value(*args, **kwargs):
-        """Returns zero.
+    def value(self, date=None, *args, **kwargs):
+        """Returns zero, or an array of zeros if `date` is vectorizable.
         """
+        if isvectorizable(date):
+            # Keeps the shape of array-like input; generators, sets and other iterables are read as flat sequences.
+            dates = np.asarray(date, dtype=object)
+            if dates.ndim == 0:
+                dates = np.asarray(list(date), dtype=object)
+            return np.zeros(dates.shape)
         return 0
 
     def _get_fixing_maturity_dates(self, start_date, end_date):
         start_date = self.calendar.adjust(start_date)
         end_date = self.calendar.adjust(end_date)
+        tenor = self.tenor(start_date)
+        if tenor.units() == ql.Days and tenor.length() > 0 and hasattr(self.calendar, 'businessDayList'):
+            # Rolling every n business days fixes on every n-th business day, so get them all in a single call.
+            business_days = [day for day in self.calendar.businessDayList(start_date, end_date) if day < end_date]
+            fixing_dates = business_days[::tenor.length()] or [start_date]
+            maturity_dates = fixing_dates[1:] + [end_date]
+            return fixing_dates, maturity_dates
+        advance = self.calendar.advance
         fixing_dates = list()
         maturity_dates = list()
-        fixing_date = self.calendar.adjust(start_date)
-        maturity_date = self.calendar.advance(fixing_date, self.tenor(start_date))
+        add_fixing_date = fixing_dates.append
+        add_maturity_date = maturity_dates.append
+        fixing_date = start_date
+        maturity_date = advance(fixing_date, tenor)
         while maturity_date < end_date:
-            fixing_dates.append(fixing_date)
-            maturity_dates.append(maturity_date)
+            add_fixing_date(fixing_date)
+            add_maturity_date(maturity_date)
             fixing_date = maturity_date
-            maturity_date = self.calendar.advance(fixing_date, self.tenor(start_date))
-        fixing_dates.append(fixing_date)
-        maturity_dates.append(end_date)
+            maturity_date = advance(fixing_date, tenor)
+        add_fixing_date(fixing_date)
+        add_maturity_date(end_date)
         return fixing_dates, maturity_dates
 
     def tenor(self, date, *args, **kwargs):
@@ -104,18 +127,15 @@ class DepositRate(Instrument):
         QuantLib.Period
             The tenor (period) to maturity of the deposit rate.
         """
-        try:
-            # If the object has a tenor attribute, return it.
-            assert self._tenor
+        if self._has_tenor:
             return self._tenor
-        except (AttributeError, AssertionError):
-            # If no tenor, then it must have a maturity. Use it to calculate the tenor.
-            date = to_ql_date(date)
-            if self.is_expired(date):
-                raise ValueError("The requested date is equal or higher than the instrument's maturity: {}".format(
-                    self.name))
+        # If no tenor, then it must have a maturity. Use it to calculate the tenor.
+        date = to_ql_date(date)
+        if self.is_expired(date):
+            raise ValueError("The requested date is equal or higher than the instrument's maturity: {}".format(
+                self.name))
 
-            return ql.Period(self._maturity - date, ql.Days)
+        return ql.Period(self._maturity - date, ql.Days)
 
     def maturity(self, date, *args, **kwargs):
         """Get maturity based on a date and tenor of the deposit rate.
@@ -130,14 +150,21 @@ class DepositRate(Instrument):
         QuantLib.Date
             The maturity based on the reference date and tenor of the deposit rate.
         """
-        try:
-            assert self._maturity
+        if not self._has_tenor:
             return self._maturity
-        except (AttributeError, AssertionError):
-            date = to_ql_date(date)
-            tenor = self._tenor
-            maturity = self.calendar.advance(date, tenor)
-            return maturity
+        date = to_ql_date(date)
+        maturity = self.calendar.advance(date, self._tenor)
+        return maturity
+
+    def _tenor_time(self, date, tenor):
+        """Year fraction of a deposit starting at `date` with `tenor`, cached by `date`.
+        """
+        try:
+            return self._tenor_times[date]
+        except KeyError:
+            time = self.day_counter.yearFraction(date, self.calendar.advance(date, tenor))
+            self._tenor_times[date] = time
+            return time
 
     @default_arguments
     @conditional_vectorize('date')
@@ -171,14 +198,37 @@ class DepositRate(Instrument):
         start_date = to_ql_date(start_date)
         date = to_ql_date(date)
         fixing_dates, maturity_dates = self._get_fixing_maturity_dates(start_date, date)
-        fixings = self.timeseries.get_values(index=[to_datetime(fixing_date) for fixing_date in fixing_dates])
+        # Dates without a fixing use the last one available.
+        fixings = self.timeseries.ts_values.reindex(to_datetime_index(fixing_dates), method='ffill').to_numpy()
 
         if spread is not None:
-            fixings += spread
+            # Not in place: the array may be a read-only view of the time series values.
+            fixings = fixings + spread
 
-        return np.prod([ql.InterestRate(fixing, self.day_counter, self.compounding,
-                                        self.frequency).compoundFactor(fixing_date, maturity_date, start_date, date)
-                       for fixing, fixing_date, maturity_date in zip(fixings, fixing_dates, maturity_dates)]) - 1
+        return self._compound_factor(fixings, fixing_dates, maturity_dates, start_date, date) - 1
+
+    def _compound_factor(self, fixings, fixing_dates, maturity_dates, start_date, date):
+        """Product of the compound factors of the rates fixed at each date in `fixing_dates`.
+        """
+        day_counter = self.day_counter
+        compounding = self.compounding
+        frequency = self.frequency
+        if compounding in (ql.Simple, ql.Continuous) or (compounding == ql.Compounded and frequency > 0):
+            # Closed form compound factors, only the year fractions need QuantLib.
+            rates = np.asarray(fixings, dtype=float)
+            times = np.array([day_counter.yearFraction(fixing_date, maturity_date, start_date, date)
+                              for fixing_date, maturity_date in zip(fixing_dates, maturity_dates)])
+            if compounding == ql.Simple:
+                factors = 1 + rates * times
+            elif compounding == ql.Continuous:
+                factors = np.exp(rates * times)
+            else:
+                factors = (1 + rates / frequency) ** (frequency * times)
+            return factors.prod()
+        return reduce(mul, (ql.InterestRate(fixing, day_counter, compounding,
+                                            frequency).compoundFactor(fixing_date, maturity_date, start_date, date)
+                            for fixing, fixing_date, maturity_date in zip(fixings, fixing_dates, maturity_dates)),
+                      1.0)
 
     def rate_helper(self, date, last_available=True, **other_args):
         """Helper for yield curve construction.
@@ -194,6 +244,11 @@ class DepositRate(Instrument):
         -------
         QuantLib.RateHelper
             Rate helper for yield curve construction.
+
+        Note
+        ----
+        Fixed tenor rates return the same helper at every date, with its quote set to the rate at `date`, so it must
+        be used before asking for the helper of another date.
         """
         # Returns None if impossible to obtain a rate helper from this time series
         if self.is_expired(date):
@@ -208,8 +263,17 @@ class DepositRate(Instrument):
             # Return none if the deposit rate can't retrieve a tenor (i.e. is expired).
             return None
         # Convert rate to simple compounding because DepositRateHelper expects simple rates.
-        time = self.day_counter.yearFraction(date, self.calendar.advance(date, tenor))
+        time = self._tenor_time(date, tenor)
         rate = ql.InterestRate(rate, self.day_counter, self.compounding,
                                self.frequency).equivalentRate(ql.Simple, ql.Annual, time).rate()
-        return ql.DepositRateHelper(to_ql_quote_handle(rate), tenor, self.fixing_days, self.calendar,
-                                    self.business_convention, False, self.day_counter)
+        if not self._has_tenor:
+            return ql.DepositRateHelper(to_ql_quote_handle(rate), tenor, self.fixing_days, self.calendar,
+                                        self.business_convention, False, self.day_counter)
+        # The helper only depends on the rate and on the evaluation date, which it already observes.
+        if self._helper is None:
+            self._helper_quote = ql.SimpleQuote(rate)
+            self._helper = ql.DepositRateHelper(ql.QuoteHandle(self._helper_quote), tenor, self.fixing_days,
+                                                self.calendar, self.business_convention, False, self.day_counter)
+        else:
+            self._helper_quote.setValue(rate)
+        return self._helper
@@ -15,6 +15,9 @@ class SwapOption(SwapRate):
         self.index = to_ql_float_index(self.ts_attributes[INDEX], self._index_tenor, self.term_structure)
         self.maturity_tenor = ql.PeriodParser.parse(self.ts_attributes[MATURITY_TENOR])
         self.fixed_leg_tenor = ql.PeriodParser.parse(self.ts_attributes[FIXED_LEG_TENOR])
+        self._index_day_counter = self.index.dayCounter()
+        # Curve self.term_structure is linked to, see set_yield_curve.
+        self._yield_curve = None
 
     def rate_helper(self, date, last_available=True, *args, **kwargs):
 
@@ -24,8 +27,25 @@ class SwapOption(SwapRate):
             return None
 
         return ql.SwaptionHelper(self.maturity_tenor, self._tenor, to_ql_quote_handle(rate), self.index,
-                                 self.fixed_leg_tenor, self.day_counter, self.index.dayCounter(), self.term_structure)
+                                 self.fixed_leg_tenor, self.day_counter, self._index_day_counter, self.term_structure)
+
+    def rate_helpers(self, dates, last_available=True, *args, **kwargs):
+        """Swaption helpers for each date in `dates`, with None where there is no quote (see ``rate_helper``).
+        """
+        rates = np.asarray(self.quotes.get_values(index=dates, last_available=last_available, fill_value=np.nan),
+                           dtype=np.float64)
+        missing = np.isnan(rates)
+        maturity_tenor, tenor, fixed_leg_tenor = self.maturity_tenor, self._tenor, self.fixed_leg_tenor
+        index, index_day_counter = self.index, self._index_day_counter
+        day_counter, term_structure = self.day_counter, self.term_structure
+        return [None if is_missing else ql.SwaptionHelper(maturity_tenor, tenor, to_ql_quote_handle(rate), index,
+                                                          fixed_leg_tenor, day_counter, index_day_counter,
+                                                          term_structure)
+                for rate, is_missing in zip(rates.tolist(), missing.tolist())]
 
     def set_yield_curve(self, yield_curve):
 
-        self.term_structure.linkTo(yield_curve)
+        # Relinking notifies the index and every helper built on the handle, so skip it for the same curve.
+        if yield_curve is not self._yield_curve:
+            self.term_structure.linkTo(yield_curve)
+            self._yield_curve = yield_curve
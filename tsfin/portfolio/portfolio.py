@@ -14,7 +14,7 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with Time Series Finance (tsfin). If not, see <https://www.gnu.org/licenses/>.
-from bisect import bisect_left, bisect_right
+from bisect import bisect_left, bisect_right, insort
 import numpy as np
 import pandas as pd
 import collections
@@ -25,7 +25,10 @@ trade = collections.namedtuple('trade', 'qty price')
 
 
 def merge_trades(old, new):
-    merged_trade = trade(old.qty + new.qty, (old.qty * old.price + new.qty * new.price)/(old.qty + new.qty))
+    old_qty, old_price = old
+    new_qty, new_price = new
+    qty = old_qty + new_qty
+    merged_trade = trade(qty, (old_qty * old_price + new_qty * new_price)/qty)
     return merged_trade
 
 
@@ -66,11 +69,18 @@ class Portfolio:
             self.security_objects = []
         else:
             self.security_objects = security_objects
+        # Name to security dicts of the security lists used by get_security, see _security_index.
+        self._security_indices = dict()
+        # Dates of self.positions in ascending order, see _position_dates, and as a datetime64 array, see find_lt_many.
+        self._sorted_dates = list()
+        self._sorted_dates_arr = np.array([], dtype='datetime64[ns]')
 
     def copy(self):
         copied_portfolio = Portfolio(self.currency, self.security_objects)
         copied_portfolio.positions = self.positions.copy()
         copied_portfolio.trades = self.trades.copy()
+        copied_portfolio._sorted_dates = self._sorted_dates.copy()
+        copied_portfolio._sorted_dates_arr = self._sorted_dates_arr
         return copied_portfolio
 
     def add_position(self, date, name, qty):
@@ -78,6 +88,44 @@ class Portfolio:
             self.positions[date][name] = self.positions[date].get(name, 0) + qty
         else:
             self.positions[date] = {name: qty}
+            if len(self._sorted_dates) == len(self.positions) - 1:
+                insort(self._sorted_dates, date)
+
+    def _position_dates(self):
+        """Dates of self.positions in ascending order, kept up to date by add_position.
+        """
+        if len(self._sorted_dates) != len(self.positions):
+            # self.positions was changed without add_position.
+            self._sorted_dates = sorted(self.positions)
+        return self._sorted_dates
+
+    def _position_dates_array(self):
+        """Dates of self.positions in ascending order as a datetime64 array, built again when dates are added.
+        """
+        sorted_dates = self._position_dates()
+        if len(self._sorted_dates_arr) != len(sorted_dates):
+            self._sorted_dates_arr = pd.to_datetime(sorted_dates).to_numpy(dtype='datetime64[ns]')
+        return self._sorted_dates_arr
+
+    def find_lt_many(self, dates):
+        """Latest dates with positions before each date in `dates`.
+
+        Parameters
+        ----------
+        dates: list of datetime-like
+            The dates.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of datetime64 with the latest date in self.positions strictly before each date.
+        """
+        sorted_dates = self._position_dates_array()
+        indices = np.searchsorted(sorted_dates, pd.to_datetime(dates).to_numpy(dtype='datetime64[ns]'),
+                                  side='left') - 1
+        if indices.size and indices.min() < 0:
+            raise ValueError('Could not find rightmost value less than date.')
+        return sorted_dates[indices]
 
     def remove_position(self, date, name, qty=None):
         date = pd.to_datetime(date)
@@ -87,34 +135,101 @@ class Portfolio:
             else:
                 self.positions[date][name] = self.positions[date].get(name, 0) - qty
 
+    def _position_arrays(self, date):
+        """Names of the securities held at `date` and an array with their quantities.
+        """
+        positions = self.positions[date]
+        names = list(positions)
+        return names, np.fromiter(positions.values(), dtype=np.float64, count=len(names))
+
+    def positions_frame(self, dates=None):
+        """DataFrame with the quantities held at each date (rows) of each security (columns), zero if not held.
+
+        Parameters
+        ----------
+        dates: list of datetime-like, optional
+            The dates. Default: all dates with positions.
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        if dates is None:
+            dates = self.positions.keys()
+        positions = {date: self.positions[date] for date in dates}
+        return pd.DataFrame.from_dict(positions, orient='index').fillna(0).sort_index()
+
+    def _security_index(self, security_objects):
+        """Dict from the ts_name and name of the securities in `security_objects` to the first security having them.
+
+        The dicts are kept by list and built again if the list changes size.
+        """
+        indexed = self._security_indices.get(id(security_objects))
+        if indexed is not None and indexed[0] is security_objects and indexed[1] == len(security_objects):
+            return indexed[2]
+        index = dict()
+        for obj in reversed(security_objects):
+            for attribute in ('name', 'ts_name'):
+                key = getattr(obj, attribute, None)
+                if key is not None:
+                    index[key] = obj
+        if len(self._security_indices) >= 16:
+            self._security_indices.clear()
+        self._security_indices[id(security_objects)] = (security_objects, len(security_objects), index)
+        return index
+
     def get_security(self, security_name, security_objects=None):
         if security_objects is None:
             security_objects = self.security_objects
-        security = next((obj for obj in security_objects if
-                         security_name == getattr(obj, 'ts_name', None) or
-                         security_name == getattr(obj, 'name', None)), [None])
-        return security
+        return self._security_index(security_objects).get(security_name, [None])
 
     def carry_to(self, date, security_objects=None):
         if security_objects is None:
             security_objects = self.security_objects
         if date not in self.positions.keys():
-            sorted_dates = sorted(list(self.positions.keys()))
-            previous_date = find_lt(date, sorted_dates)
-            for security_name in self.positions[previous_date].keys():
-                # print('carrying ' + security_name)
-                security = self.get_security(security_name, security_objects)
-                self.add_position(date, self.currency, security.cash_to_date(start_date=previous_date,
-                                                                             date=date))
-                if not security.is_expired(date):
-                    self.add_position(date, security_name, self.positions[previous_date][security_name])
+            self._carry(find_lt(date, self._position_dates()), date, security_objects)
+
+    def carry_to_range(self, dates, security_objects=None):
+        """Carry the positions to each date in `dates` without positions, as carry_to would do for each one in order.
+
+        Parameters
+        ----------
+        dates: list of datetime-like
+            The dates.
+        security_objects: list, optional
+            The securities held. Default: self.security_objects.
+        """
+        if security_objects is None:
+            security_objects = self.security_objects
+        dates = [date for date in pd.to_datetime(dates).unique().sort_values() if date not in self.positions]
+        if not dates:
+            return
+        last_date = None
+        for date, previous_date in zip(dates, self.find_lt_many(dates)):
+            # Dates carried in this loop are also positions dates, and later than the ones found before it.
+            previous_date = pd.Timestamp(previous_date)
+            if last_date is not None and last_date > previous_date:
+                previous_date = last_date
+            self._carry(previous_date, date, security_objects)
+            last_date = date
+
+    def _carry(self, previous_date, date, security_objects):
+        for security_name in self.positions[previous_date].keys():
+            # print('carrying ' + security_name)
+            security = self.get_security(security_name, security_objects)
+            self.add_position(date, self.currency, security.cash_to_date(start_date=previous_date,
+                                                                         date=date))
+            if not security.is_expired(date):
+                self.add_position(date, security_name, self.positions[previous_date][security_name])
 
     def add_trade(self, date, name, new_trade, security_objects=None):
         date = pd.to_datetime(date)
-        if date in self.trades.keys():
-            self.trades[date][name] = merge_trades(self.trades[date].get(name, trade(0, 0)), new_trade)
-        else:
+        date_trades = self.trades.get(date)
+        if date_trades is None:
             self.trades[date] = {name: new_trade}
+        else:
+            old_trade = date_trades.get(name)
+            date_trades[name] = new_trade if old_trade is None else merge_trades(old_trade, new_trade)
         # Now apply the new trade to the positions dict
         self._apply_trade(date, name, new_trade, security_objects)
 
@@ -132,255 +247,113 @@ class Portfolio:
         if security_objects is None:
             security_objects = self.security_objects
         self.carry_to(date, security_objects)
-        value_dict = dict()
-        for security_name in self.positions[date].keys():
-            if security_name == self.currency:
-                unit_value = 1
-            else:
-                unit_value = self.get_security(security_name, security_objects).value(date=date, last_available=True)
-                if np.isnan(unit_value):
-                    print("Security {0} is returning null value in {1}, replacing by zero..".format(security_name,
-                                                                                                    date))
-                    unit_value = 0
-            value_dict[security_name] = unit_value * self.positions[date][security_name]
-        value = sum(value_dict.values())
+        names, quantities = self._position_arrays(date)
+        unit_values = np.fromiter((1 if name == self.currency else
+                                   self.get_security(name, security_objects).value(date=date, last_available=True)
+                                   for name in names), dtype=np.float64, count=len(names))
+        null_values = np.isnan(unit_values)
+        if null_values.any():
+            print("Securities {0} are returning null value in {1}, replacing by zero..".format(
+                [name for name, null in zip(names, null_values) if null], date))
+            unit_values = np.where(null_values, 0, unit_values)
+        values = unit_values * quantities
+        value = float(values.sum())
+        value_dict = dict(zip(names, values.tolist()))
         return value, value_dict
 
-    def ytm(self, date, security_objects=None, **kwargs):
+    def _unit_value(self, date, security_name, security):
+        """Value of a unit of `security` at `date`, one for the portfolio currency and zero if null.
+        """
+        if security_name == self.currency:
+            return 1
+        unit_value = security.value(date=date, last_available=True)
+        if np.isnan(unit_value):
+            print("Security {0} is returning null value in {1}, replacing by zero..".format(security_name, date))
+            return 0
+        return unit_value
+
+    def _weighted_metric(self, date, method_name, security_objects=None, **kwargs):
+        """Value weighted average of the results of `method_name` for the securities held at `date`.
+
+        Securities without `method_name` (like the portfolio currency) and null results count as zero. Additional
+        keyword arguments are passed to the securities' method. The values and results are computed in a single pass
+        over the securities. The result is zero without positions, and ZeroDivisionError is raised if the positions
+        add up to zero value.
+        """
         if security_objects is None:
             security_objects = self.security_objects
         self.carry_to(date, security_objects)
+        names, quantities = self._position_arrays(date)
+        unit_values = np.empty(len(names))
+        results = np.empty(len(names))
         result_dict = dict()
-        value, value_dict = self.value(date, security_objects)
-        for security_name in self.positions[date].keys():
+        for i, security_name in enumerate(names):
+            security = self.get_security(security_name, security_objects)
+            unit_values[i] = self._unit_value(date, security_name, security)
             try:
-                unit_result = self.get_security(security_name, security_objects).ytm(date=date)
+                unit_result = getattr(security, method_name)(date=date, **kwargs)
                 if np.isnan(unit_result):
-                    print("Security {0} is returning null ytm in {1}, replacing by zero..".format(security_name,
-                                                                                                  date))
+                    print("Security {0} is returning null {1} in {2}, replacing by zero..".format(security_name,
+                                                                                                  method_name, date))
                     unit_result = 0
             except AttributeError:
                 unit_result = 0
-            result_dict[security_name] = unit_result
-        result = sum(value_dict[name] * result_dict[name] / value for name in self.positions[date])
+            result_dict[security_name] = results[i] = unit_result
+        values = unit_values * quantities
+        if not len(values):
+            return 0.0, result_dict
+        total_value = values.sum()
+        if total_value == 0:
+            # Same error as the weights value / total_value would raise with plain floats.
+            raise ZeroDivisionError("The portfolio has zero value in {}, can't weight the {} of its securities".format(
+                date, method_name))
+        result = float(np.dot(values, results) / total_value)
         return result, result_dict
 
-    def ytw(self, date, security_objects=None, **kwargs):
-        if security_objects is None:
-            security_objects = self.security_objects
-        self.carry_to(date, security_objects)
-        result_dict = dict()
-        value, value_dict = self.value(date, security_objects)
-        for security_name in self.positions[date].keys():
-            try:
-                unit_result = self.get_security(security_name, security_objects).ytw(date=date)
-                if np.isnan(unit_result):
-                    print("Security {0} is returning null ytw in {1}, replacing by zero..".format(security_name,
-                                                                                                  date))
-                    unit_result = 0
-            except AttributeError:
-                unit_result = 0
-            result_dict[security_name] = unit_result
+    def ytm(self, date, security_objects=None, **kwargs):
+        return self._weighted_metric(date, 'ytm', security_objects)
 
-        result = sum(value_dict[name] * result_dict[name] / value for name in self.positions[date])
-        return result, result_dict
+    def ytw(self, date, security_objects=None, **kwargs):
+        return self._weighted_metric(date, 'ytw', security_objects)
 
     def ytw_rolling_call(self, date, security_objects=None, **kwargs):
         pass
 
     def zspread_to_mat(self, date, security_objects=None, **kwargs):
-        if security_objects is None:
-            security_objects = self.security_objects
-        self.carry_to(date, security_objects)
-        result_dict = dict()
-        value, value_dict = self.value(date, security_objects)
-        yield_curve_timeseries = kwargs['yield_curve_timeseries']
-        for security_name in self.positions[date].keys():
-            try:
-                unit_result = self.get_security(security_name,
-                                                security_objects).zspread_to_mat(date=date,
-                                                                        yield_curve_timeseries=yield_curve_timeseries)
-                if np.isnan(unit_result):
-                    print("Security {0} is returning null zspread_to_mat {1}, replacing by zero..".format(
-                        security_name, date))
-                    unit_result = 0
-            except AttributeError:
-                unit_result = 0
-            result_dict[security_name] = unit_result
-        result = sum(value_dict[name] * result_dict[name] / value for name in self.positions[date])
-        return result, result_dict
+        return self._weighted_metric(date, 'zspread_to_mat', security_objects,
+                                     yield_curve_timeseries=kwargs['yield_curve_timeseries'])
 
     def zspread_to_worst(self, date, security_objects=None, **kwargs):
-        if security_objects is None:
-            security_objects = self.security_objects
-        self.carry_to(date, security_objects)
-        result_dict = dict()
-        value, value_dict = self.value(date, security_objects)
-        yield_curve_timeseries = kwargs['yield_curve_timeseries']
-        for security_name in self.positions[date].keys():
-            try:
-                unit_result = self.get_security(security_name,
-                                                security_objects).zspread_to_worst(date=date,
-                                                                        yield_curve_timeseries=yield_curve_timeseries)
-                if np.isnan(unit_result):
-                    print("Security {0} is returning null zspread_to_worst {1}, replacing by zero..".format(
-                        security_name, date))
-                    unit_result = 0
-            except AttributeError:
-                unit_result = 0
-            result_dict[security_name] = unit_result
-
-        result = sum(value_dict[name] * result_dict[name] / value for name in self.positions[date])
-        return result, result_dict
+        return self._weighted_metric(date, 'zspread_to_worst', security_objects,
+                                     yield_curve_timeseries=kwargs['yield_curve_timeseries'])
 
     def zspread_to_worst_rolling_call(self, date, security_objects=None, **kwargs):
-        if security_objects is None:
-            security_objects = self.security_objects
-        self.carry_to(date, security_objects)
-        result_dict = dict()
-        value, value_dict = self.value(date, security_objects)
-        yield_curve_timeseries = kwargs['yield_curve_timeseries']
-        for security_name in self.positions[date].keys():
-            try:
-                unit_result = self.get_security(security_name,
-                                                security_objects).zspread_to_worst_rolling_call(date=date,
-                                                                        yield_curve_timeseries=yield_curve_timeseries)
-                if np.isnan(unit_result):
-                    print("Security {0} is returning null zspread_to_worst_rolling_call {1}, replacing by "
-                          "zero..".format(security_name, date))
-                    unit_result = 0
-            except AttributeError:
-                unit_result = 0
-            result_dict[security_name] = unit_result
-
-        result = sum(value_dict[name] * result_dict[name] / value for name in self.positions[date])
-        return result, result_dict
+        return self._weighted_metric(date, 'zspread_to_worst_rolling_call', security_objects,
+                                     yield_curve_timeseries=kwargs['yield_curve_timeseries'])
 
     def mac_duration_to_mat(self, date, security_objects=None, **kwargs):
-        if security_objects is None:
-            security_objects = self.security_objects
-        self.carry_to(date, security_objects)
-        result_dict = dict()
-        value, value_dict = self.value(date, security_objects)
-        for security_name in self.positions[date].keys():
-            try:
-                unit_result = self.get_security(security_name, security_objects).duration_to_mat(
-                    duration_type=to_ql_duration('Macaulay'), date=date)
-                if np.isnan(unit_result):
-                    print("Security {0} is returning null mod_duration_to_mat {1}, replacing by "
-                          "zero..".format(security_name, date))
-                    unit_result = 0
-            except AttributeError:
-                unit_result = 0
-            result_dict[security_name] = unit_result
-
-        result = sum(value_dict[name] * result_dict[name] / value for name in self.positions[date])
-        return result, result_dict
+        return self._weighted_metric(date, 'duration_to_mat', security_objects,
+                                     duration_type=to_ql_duration('Macaulay'))
 
     def mac_duration_to_worst(self, date, security_objects=None, **kwargs):
-        if security_objects is None:
-            security_objects = self.security_objects
-        self.carry_to(date, security_objects)
-        result_dict = dict()
-        value, value_dict = self.value(date, security_objects)
-        for security_name in self.positions[date].keys():
-            try:
-                unit_result = self.get_security(security_name, security_objects).duration_to_worst(
-                    duration_type=to_ql_duration('Macaulay'), date=date)
-                if np.isnan(unit_result):
-                    print("Security {0} is returning null mod_duration_to_worst {1}, replacing by "
-                          "zero..".format(security_name, date))
-                    unit_result = 0
-            except AttributeError:
-                unit_result = 0
-            result_dict[security_name] = unit_result
-
-        result = sum(value_dict[name] * result_dict[name] / value for name in self.positions[date])
-        return result, result_dict
+        return self._weighted_metric(date, 'duration_to_worst', security_objects,
+                                     duration_type=to_ql_duration('Macaulay'))
 
     def mac_duration_to_worst_rolling_call(self, date, security_objects=None, **kwargs):
-        if security_objects is None:
-            security_objects = self.security_objects
-        self.carry_to(date, security_objects)
-        result_dict = dict()
-        value, value_dict = self.value(date, security_objects)
-        for security_name in self.positions[date].keys():
-            try:
-                unit_result = self.get_security(security_name, security_objects).duration_to_worst_rolling_call(
-                    duration_type=to_ql_duration('Macaulay'), date=date)
-                if np.isnan(unit_result):
-                    print("Security {0} is returning null mod_duration_to_worst_rolling_call {1}, replacing by "
-                          "zero..".format(security_name, date))
-                    unit_result = 0
-            except AttributeError:
-                unit_result = 0
-            result_dict[security_name] = unit_result
-
-        result = sum(value_dict[name] * result_dict[name] / value for name in self.positions[date])
-        return result, result_dict
+        return self._weighted_metric(date, 'duration_to_worst_rolling_call', security_objects,
+                                     duration_type=to_ql_duration('Macaulay'))
 
     def mod_duration_to_mat(self, date, security_objects=None, **kwargs):
-        if security_objects is None:
-            security_objects = self.security_objects
-        self.carry_to(date, security_objects)
-        result_dict = dict()
-        value, value_dict = self.value(date, security_objects)
-        for security_name in self.positions[date].keys():
-            try:
-                unit_result = self.get_security(security_name, security_objects).duration_to_mat(
-                    duration_type=to_ql_duration('Modified'), date=date)
-                if np.isnan(unit_result):
-                    print("Security {0} is returning null mod_duration_to_mat {1}, replacing by "
-                          "zero..".format(security_name, date))
-                    unit_result = 0
-            except AttributeError:
-                unit_result = 0
-            result_dict[security_name] = unit_result
-
-        result = sum(value_dict[name] * result_dict[name] / value for name in self.positions[date])
-        return result, result_dict
+        return self._weighted_metric(date, 'duration_to_mat', security_objects,
+                                     duration_type=to_ql_duration('Modified'))
 
     def mod_duration_to_worst(self, date, security_objects=None, **kwargs):
-        if security_objects is None:
-            security_objects = self.security_objects
-        self.carry_to(date, security_objects)
-        result_dict = dict()
-        value, value_dict = self.value(date, security_objects)
-        for security_name in self.positions[date].keys():
-            try:
-                unit_result = self.get_security(security_name, security_objects).duration_to_worst(
-                    duration_type=to_ql_duration('Modified'), date=date)
-                if np.isnan(unit_result):
-                    print("Security {0} is returning null mod_duration_to_worst {1}, replacing by "
-                          "zero..".format(security_name, date))
-                    unit_result = 0
-            except AttributeError:
-                unit_result = 0
-            result_dict[security_name] = unit_result
-
-        result = sum(value_dict[name] * result_dict[name] / value for name in self.positions[date])
-        return result, result_dict
+        return self._weighted_metric(date, 'duration_to_worst', security_objects,
+                                     duration_type=to_ql_duration('Modified'))
 
     def mod_duration_to_worst_rolling_call(self, date, security_objects=None, **kwargs):
-        if security_objects is None:
-            security_objects = self.security_objects
-        self.carry_to(date, security_objects)
-        result_dict = dict()
-        value, value_dict = self.value(date, security_objects)
-        for security_name in self.positions[date].keys():
-            try:
-                unit_result = self.get_security(security_name, security_objects).duration_to_worst_rolling_call(
-                    duration_type=to_ql_duration('Modified'), date=date)
-                if np.isnan(unit_result):
-                    print("Security {0} is returning null mod_duration_to_worst_rolling_call {1}, replacing by "
-                          "zero..".format(security_name, date))
-                    unit_result = 0
-            except AttributeError:
-                unit_result = 0
-            result_dict[security_name] = unit_result
-
-        result = sum(value_dict[name] * result_dict[name] / value for name in self.positions[date])
-        return result, result_dict
+        return self._weighted_metric(date, 'duration_to_worst_rolling_call', security_objects,
+                                     duration_type=to_ql_duration('Modified'))
 
     def convexity_to_mat(self, date, security_objects=None, **kwargs):
         pass
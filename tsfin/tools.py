@@ -15,11 +15,14 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with Time Series Finance (tsfin). If not, see <https://www.gnu.org/licenses/>.
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 import QuantLib as ql
 from pandas.tseries.offsets import BDay, Week, BMonthEnd, BYearEnd
-from tsfin.base.qlconverters import to_ql_date
-from tsfin.base.basetools import to_datetime
+from tsfin.base.qlconverters import to_ql_date, to_ql_dates
+from tsfin.base.basetools import to_datetime, filter_series
 from tsio import TimeSeries, TimeSeriesCollection
 from tsfin.base.instrument import Instrument
 from tsfin.instruments.bonds import FixedRateBond, CallableFixedRateBond, FloatingRateBond
@@ -35,6 +38,27 @@ from tsfin.constants import TYPE, BOND, BOND_TYPE, FIXEDRATE, CALLABLEFIXEDRATE,
     INDEX_TIME_SERIES, ZERO_RATE, SWAP_VOL
 
 
+# Instrument classes built from the time series alone, by TYPE attribute, see generate_instruments.
+_INSTRUMENTS = {
+    DEPOSIT_RATE: DepositRate,
+    DEPOSIT_RATE_FUTURE: DepositRate,
+    RATE_INDEX: DepositRate,
+    ZERO_RATE: DepositRate,
+    CURRENCY_FUTURE: CurrencyFuture,
+    SWAP_RATE: SwapRate,
+    SWAP_VOL: SwapOption,
+    OIS_RATE: OISRate,
+    EQUITY: Instrument,
+    CDS: CDSRate,
+}
+
+# Bond classes built from the time series alone, by BOND_TYPE attribute.
+_BONDS = {
+    FIXEDRATE: FixedRateBond,
+    CALLABLEFIXEDRATE: CallableFixedRateBond,
+}
+
+
 def generate_instruments(ts_collection, ql_process=None, indices=None, index_curves=None):
     """ Given a collection of :py:obj:`TimeSeries`, instantiate instruments with each one of them.
 
@@ -61,54 +85,38 @@ def generate_instruments(ts_collection, ql_process=None, indices=None, index_cur
     :py:obj:`TimeSeriesCollection`
         Time series collection with the created instruments.
     """
-    instrument_list = list()
-
-    for ts in ts_collection:
-        if not isinstance(ts, TimeSeries):
-            # Then ts must be an instance of its object already. Add it to instrument list and skip.
-            instrument_list.append(ts)
-            continue
-
-        ts_type = ts.get_attribute(TYPE)
-
-        if ts_type == BOND:
-            bond_type = str(ts.get_attribute(BOND_TYPE)).upper()
-            if bond_type == FLOATINGRATE:
-                # Floating rate bonds need some special treatment.
-                reference_curve = index_curves[str(ts.get_attribute(INDEX)).upper()]
-                index_timeseries = indices[str(ts.get_attribute(INDEX_TIME_SERIES)).upper()]
-                instrument = FloatingRateBond(ts, reference_curve=reference_curve,
-                                              index_timeseries=index_timeseries)
-            elif bond_type == FIXEDRATE:
-                instrument = FixedRateBond(ts)
-            elif bond_type == CALLABLEFIXEDRATE:
-                instrument = CallableFixedRateBond(ts)
-            else:
-                instrument_list.append(ts)
-                continue
-
-        elif ts_type in (DEPOSIT_RATE, DEPOSIT_RATE_FUTURE, RATE_INDEX, ZERO_RATE):
-            instrument = DepositRate(ts)
-        elif ts_type == CURRENCY_FUTURE:
-            instrument = CurrencyFuture(ts)
-        elif ts_type == SWAP_RATE:
-            instrument = SwapRate(ts)
-        elif ts_type == SWAP_VOL:
-            instrument = SwapOption(ts)
-        elif ts_type == OIS_RATE:
-            instrument = OISRate(ts)
-        elif ts_type == EQUITY_OPTION:
-            instrument = BaseEquityOption(ts, ql_process=ql_process)
-        elif ts_type == EQUITY:
-            instrument = Instrument(ts)
-        elif ts_type == CDS:
-            instrument = CDSRate(ts)
-        else:
-            instrument = TimeSeries(ts)
+    return TimeSeriesCollection([_make_instrument(ts, ql_process, indices, index_curves) for ts in ts_collection])
+
 
-        instrument_list.append(instrument)
+def _make_instrument(ts, ql_process, indices, index_curves):
+    """ The instrument of a single time series, see generate_instruments.
 
-    return TimeSeriesCollection(instrument_list)
+    The time series itself is returned if it is not a :py:class:`TimeSeries` or is a bond of an unknown type.
+    """
+    if not isinstance(ts, TimeSeries):
+        # Then ts must be an instance of its object already.
+        return ts
+
+    ts_type = ts.get_attribute(TYPE)
+    instrument_class = _INSTRUMENTS.get(ts_type)
+
+    if instrument_class is not None:
+        return instrument_class(ts)
+    elif ts_type == BOND:
+        bond_type = str(ts.get_attribute(BOND_TYPE)).upper()
+        if bond_type == FLOATINGRATE:
+            # Floating rate bonds need some special treatment.
+            reference_curve = index_curves[str(ts.get_attribute(INDEX)).upper()]
+            index_timeseries = indices[str(ts.get_attribute(INDEX_TIME_SERIES)).upper()]
+            return FloatingRateBond(ts, reference_curve=reference_curve, index_timeseries=index_timeseries)
+        elif bond_type in _BONDS:
+            return _BONDS[bond_type](ts)
+        else:
+            return ts
+    elif ts_type == EQUITY_OPTION:
+        return BaseEquityOption(ts, ql_process=ql_process)
+    else:
+        return TimeSeries(ts)
 
 
 def ts_values_to_dict(*args):
@@ -123,11 +131,24 @@ def ts_values_to_dict(*args):
     dict
         Dictionary of parameter tuples, indexed by dates.
     """
-    params_df = pd.concat([getattr(ts, 'ts_values') for ts in args], axis=1)
-    params = dict()
-    for data in params_df.itertuples():
-        params[to_ql_date(data[0])] = tuple(data[i] for i in range(1, len(data)))
-    return params
+    return dict(ts_values_iter(*args))
+
+
+def ts_values_iter(*args):
+    """ Iterate over the dates and tuples of values of multiple time series, in the order of their dates.
+
+    Same items as ``ts_values_to_dict(*args).items()``, without building the dictionary.
+
+    Parameters
+    ----------
+    args: time series names (each time series represents a parameter).
+
+    Yields
+    ------
+    tuple
+        (QuantLib.Date, tuple of parameters)
+    """
+    yield from _series_rows([ts.ts_values for ts in args])
 
 
 def ts_to_dict(*args):
@@ -142,40 +163,67 @@ def ts_to_dict(*args):
     dict
         Dictionary of parameter tuples, indexed by dates.
     """
-    params_df = pd.concat([ts for ts in args], axis=1)
-    params = dict()
-    for data in params_df.itertuples():
-        params[to_ql_date(data[0])] = tuple(data[i] for i in range(1, len(data)))
-    return params
+    return dict(_series_rows(args))
 
 
-def filter_series(df, initial_date=None, final_date=None):
-    """ Filter inplace a pandas.Series to keep its index between an initial and a final date.
+def _series_rows(series):
+    """Iterator over the QuantLib dates and row tuples of the concatenation of `series`.
 
-    Parameters
-    ----------
-    df: :py:obj:`pandas.Series`
-        Series to be filtered.
-    initial_date: date-like
-        Initial date.
-    final_date: date-like
-        Final date.
+    Series on the same index are zipped directly, without concatenating them into a DataFrame first.
     """
-    if initial_date is None and final_date is not None:
-        final_date = to_datetime(final_date)
-        df.drop(df[(df.index > final_date)].index, inplace=True)
-    elif final_date is None and initial_date is not None:
-        initial_date = to_datetime(initial_date)
-        df.drop(df[(df.index < initial_date)].index, inplace=True)
-    elif final_date is None and initial_date is None:
-        pass
-    elif initial_date == final_date:
-        initial_date = to_datetime(initial_date)
-        df.drop(df[(df.index != initial_date)].index, inplace=True)
-    else:
-        initial_date = to_datetime(initial_date)
-        final_date = to_datetime(final_date)
-        df.drop(df[(df.index < initial_date) | (df.index > final_date)].index, inplace=True)
+    index = series[0].index
+    if all(values.ndim == 1 and (values.index is index or values.index.equals(index)) for values in series):
+        return zip(to_ql_dates(index), zip(*[values.to_numpy() for values in series]))
+    params_df = pd.concat(series, axis=1)
+    columns = [params_df.iloc[:, i].to_numpy() for i in range(params_df.shape[1])]
+    return zip(to_ql_dates(params_df.index), zip(*columns))
+
+
+def _relative_change(df, base):
+    """``df / base - 1`` computed on the underlying arrays, with the index (and columns) of `df`.
+
+    The division result is reused for the subtraction, and there is no index alignment, since `base` is always
+    built on the index of `df`.
+    """
+    result = np.divide(df.to_numpy(), np.asarray(base))
+    result -= 1
+    if isinstance(df, pd.DataFrame):
+        return pd.DataFrame(result, index=df.index, columns=df.columns, copy=False)
+    return pd.Series(result, index=df.index, name=df.name, copy=False)
+
+
+# Offsets of the period ends the to-date returns are measured from, by calc_type, see returns.
+_PERIOD_ENDS = {
+    'WTD': Week(weekday=4),
+    'MTD': BMonthEnd(),
+    'YTD': BYearEnd(),
+}
+
+
+def _fill_missing(values, fill_value):
+    """`values` with its NaNs replaced by `fill_value` (a scalar, or one value per column), like fillna.
+    """
+    return np.where(np.isnan(values), np.asarray(fill_value, dtype=np.float64), values)
+
+
+def _padded_at_anchors(df, anchors):
+    """Array with the value of `df` at the last of the sorted `anchors` up to each date of its index.
+
+    Same as ``df.reindex(anchors, method='pad').reindex(df.index, method='pad').to_numpy()``, but the positions are
+    composed with two searchsorted calls instead of building the intermediate frame.
+    """
+    values = df.to_numpy(dtype=np.float64)
+    base = np.full_like(values, np.nan)
+    if len(anchors) == 0:
+        return base
+    index = df.index
+    anchor_positions = index.searchsorted(anchors, side='right') - 1
+    last_anchors = anchors.searchsorted(index, side='right') - 1
+    has_anchor = last_anchors >= 0
+    positions = np.where(has_anchor, anchor_positions[np.maximum(last_anchors, 0)], -1)
+    available = positions >= 0
+    base[available] = values[positions[available]]
+    return base
 
 
 def returns(ts, calc_type='D', force=False):
@@ -205,59 +253,47 @@ def returns(ts, calc_type='D', force=False):
     first_index = df.first_valid_index()
     last_index = df.last_valid_index()
 
-    def array_return(x):
-        return x[-1] / x[0] - 1
-
-    def one_month_ago(x):
-        return to_datetime(to_ql_date(x) - ql.Period(1, ql.Months))
-
-    def six_months_ago(x):
-        return to_datetime(to_ql_date(x) - ql.Period(6, ql.Months))
-
     calc_type = calc_type.upper()
     if calc_type == 'D':
         return df.pct_change()
     elif calc_type == 'W':
-        df = df.reindex()
-        return df.resample(BDay()).fillna(method='pad').rolling(6, min_periods=2).apply(array_return)
+        df = df.resample(BDay()).ffill()
+        # Return over a rolling window of 6 business days, or since the first day in the first days.
+        values = df.to_numpy(dtype=np.float64)
+        base = np.full_like(values, np.nan)
+        base[5:] = values[:-5]
+        base[1:5] = values[0]
+        return _relative_change(df, base)
     elif calc_type == 'M':
-        one_month_ago = df.index.map(one_month_ago)
-        df_one_month_ago = df.reindex(one_month_ago, method='pad')
+        one_month_ago = df.index - pd.DateOffset(months=1)
+        df_one_month_ago = df.reindex(one_month_ago, method='pad').to_numpy(dtype=np.float64)
         if force:
-            df_one_month_ago = df_one_month_ago.fillna(df.loc[first_index])
-        return pd.Series(index=df.index, data=df.values/df_one_month_ago.values) - 1
+            df_one_month_ago = _fill_missing(df_one_month_ago, df.loc[first_index])
+        return _relative_change(df, df_one_month_ago)
     elif calc_type == '6M':
-        six_months_ago = df.index.map(six_months_ago)
-        df_six_months_ago = df.reindex(six_months_ago, method='pad')
+        six_months_ago = df.index - pd.DateOffset(months=6)
+        df_six_months_ago = df.reindex(six_months_ago, method='pad').to_numpy(dtype=np.float64)
         if force is True:
-            df_six_months_ago = df_six_months_ago.fillna(df.loc[first_index])
-        return pd.Series(index=df.index, data=df.values/df_six_months_ago.values) - 1
+            df_six_months_ago = _fill_missing(df_six_months_ago, df.loc[first_index])
+        return _relative_change(df, df_six_months_ago)
     elif calc_type == 'Y':
         one_year_ago = df.index - pd.DateOffset(years=1)
-        df_one_year_ago = df.reindex(one_year_ago, method='pad')
+        df_one_year_ago = df.reindex(one_year_ago, method='pad').to_numpy(dtype=np.float64)
         if force is True:
-            df_one_year_ago = df_one_year_ago.fillna(df.loc[first_index])
-        return pd.Series(index=df.index, data=df.values/df_one_year_ago.values) - 1
+            df_one_year_ago = _fill_missing(df_one_year_ago, df.loc[first_index])
+        return _relative_change(df, df_one_year_ago)
     elif calc_type == '3Y':
-        three_years_ago = df.index - pd.dateOffset(years=3)
-        df_three_years_ago = df.reindex(three_years_ago, method='pad')
+        three_years_ago = df.index - pd.DateOffset(years=3)
+        df_three_years_ago = df.reindex(three_years_ago, method='pad').to_numpy(dtype=np.float64)
         if force:
-            df_three_years_ago = df_three_years_ago.fillna(df.loc[first_index])
-        return pd.Series(index=df.index, data=df.values/df_three_years_ago.values) - 1
-    elif calc_type == 'WTD':
-        index = pd.date_range(first_index, last_index, freq=Week(weekday=4))
-        df_week_end = df.reindex(index, method='pad').reindex(df.index, method='pad')
-        return df / df_week_end - 1
-    elif calc_type == 'MTD':
-        index = pd.date_range(first_index, last_index, freq=BMonthEnd())
-        df_month_end = df.reindex(index, method='pad').reindex(df.index, method='pad')
-        return df / df_month_end - 1
-    elif calc_type == 'YTD':
-        index = pd.date_range(first_index, last_index, freq=BYearEnd())
-        df_year_end = df.reindex(index, method='pad').reindex(df.index, method='pad')
-        return df / df_year_end - 1
+            df_three_years_ago = _fill_missing(df_three_years_ago, df.loc[first_index])
+        return _relative_change(df, df_three_years_ago)
+    elif calc_type in _PERIOD_ENDS:
+        # One anchor per week, month or year spanned by the series, at its last (business) day.
+        anchors = pd.date_range(first_index, last_index, freq=_PERIOD_ENDS[calc_type])
+        return _relative_change(df, _padded_at_anchors(df, anchors))
     elif calc_type == 'SI':
-        return df / df.loc[first_index] - 1
+        return _relative_change(df, df.loc[first_index])
 
 
 def ql_swaption_engine(model_class, term_structure):
@@ -276,7 +312,55 @@ def ql_swaption_engine(model_class, term_structure):
         return model, engine
 
 
-def calibrate_swaption_model(date, model_class, term_structure_ts, swaption_vol_ts_collection):
+def calibration_helpers(swaptions, date, yield_curve, engine, last_available=True):
+    """ Swaption helpers of a collection of swaptions at a date, all priced with the same engine.
+
+    Parameters
+    ----------
+    swaptions: list of :py:obj:`SwapOption`
+        The swaptions. Their term structure is linked to `yield_curve`.
+    date: QuantLib.Date
+        Reference date.
+    yield_curve: QuantLib.YieldTermStructure
+        The yield curve of the helpers.
+    engine: QuantLib.PricingEngine
+        The engine of the model being calibrated.
+    last_available: bool, optional
+        Whether to use last available quotes if missing data.
+
+    Returns
+    -------
+    list of QuantLib.SwaptionHelper
+        The helpers of the swaptions quoted at `date`, the ones without a quote are left out.
+    """
+    helpers = list()
+    add_helper = helpers.append
+    for swaption in swaptions:
+        swaption.set_yield_curve(yield_curve=yield_curve)
+        helper = swaption.rate_helper(date=date, last_available=last_available)
+        if helper is not None:
+            helper.setPricingEngine(engine)
+            add_helper(helper)
+    return helpers
+
+
+# Parameters of the models calibrated by calibrate_swaption_model with cache=True, see _calibration_key.
+_calibrated_params = dict()
+
+
+def _calibration_key(date, model_class, yield_curve, swaption_vol_ts_collection):
+    """ Key of a calibration, from the model class, the date, the yield curve and the swaption quotes at the date.
+    """
+    quotes = list()
+    for ts in swaption_vol_ts_collection:
+        quote = ts.get_values(index=date, last_available=True, fill_value=np.nan)
+        # NaN never equals itself, so missing quotes are keyed as None.
+        quotes.append((ts.ts_name, None if np.isnan(quote) else float(quote)))
+    # The curve is stored with the parameters, so its id can't be reused by another curve while in the cache.
+    return model_class, date, id(yield_curve), tuple(quotes)
+
+
+def calibrate_swaption_model(date, model_class, term_structure_ts, swaption_vol_ts_collection, cache=False):
     """ Calibrate a Hull-White QuantLib model.
 
     Parameters
@@ -289,30 +373,115 @@ def calibrate_swaption_model(date, model_class, term_structure_ts, swaption_vol_
         Yield curve time series of the curve.
     swaption_vol_ts_collection: :py:obj:`TimeSeriesCollection`
         Collection of swaption volatility (Black, log-normal) quotes.
+    cache: bool, optional
+        Whether to reuse the parameters of an earlier calibration with the same model class, date, yield curve object
+        and swaption quotes. Each call still returns a new model. Default is False.
 
     Returns
     -------
     QuantLib.Model
         Calibrated model.
     """
-    # This has only been tested for model_class = HullWhite
     date = to_ql_date(date)
-    print("Calibrating {0} 1F short rate model for date = {1}".format(model_class, date))
     yield_curve = term_structure_ts.yield_curve(date=date)
+    if not cache:
+        return _calibrate_swaption_model(date, model_class, yield_curve, swaption_vol_ts_collection)
+    key = _calibration_key(date, model_class, yield_curve, swaption_vol_ts_collection)
+    try:
+        _, params = _calibrated_params[key]
+    except KeyError:
+        model = _calibrate_swaption_model(date, model_class, yield_curve, swaption_vol_ts_collection)
+        if len(_calibrated_params) >= 32:
+            _calibrated_params.clear()
+        _calibrated_params[key] = (yield_curve, list(model.params()))
+        return model
+    ql.Settings.instance().evaluationDate = date
+    model, _ = ql_swaption_engine(model_class=model_class, term_structure=ql.YieldTermStructureHandle(yield_curve))
+    model.setParams(ql.Array(params))
+    return model
+
+
+def _calibrate_swaption_model(date, model_class, yield_curve, swaption_vol_ts_collection):
+    # This has only been tested for model_class = HullWhite
+    print("Calibrating {0} 1F short rate model for date = {1}".format(model_class, date))
     term_structure = ql.YieldTermStructureHandle(yield_curve)
 
     ql.Settings.instance().evaluationDate = date
     model, engine = ql_swaption_engine(model_class=model_class, term_structure=term_structure)
 
-    swaption_helpers = list()
     swaption_vol = generate_instruments(swaption_vol_ts_collection)
-    for swaption in swaption_vol:
-        swaption.set_yield_curve(yield_curve=yield_curve)
-        helper = swaption.rate_helper(date=date)
-        helper.setPricingEngine(engine)
-        swaption_helpers.append(helper)
+    swaption_helpers = calibration_helpers(swaption_vol, date=date, yield_curve=yield_curve, engine=engine)
 
     optimization_method = ql.LevenbergMarquardt(1.0e-8, 1.0e-8, 1.0e-8)
     end_criteria = ql.EndCriteria(10000, 100, 1e-6, 1e-8, 1e-8)
     model.calibrate(swaption_helpers, optimization_method, end_criteria)
     return model
+
+
+# Options built by the option_factory given to price_many, in each pool worker process.
+_worker_options = dict()
+
+
+def _init_price_many_worker(option_factory):
+    _worker_options.clear()
+    _worker_options.update(option_factory())
+
+
+def _price_many_chunk(option_names, dates, metric, kwargs):
+    return _price_options(_worker_options, option_names, dates, metric, kwargs)
+
+
+def _price_options(options, option_names, dates, metric, kwargs):
+    result = np.empty((len(option_names), len(dates)))
+    for i, name in enumerate(option_names):
+        method = getattr(options[name], metric)
+        for j, date in enumerate(dates):
+            value = method(date=date, base_date=date, **kwargs)
+            # Some metrics aren't available for every option, e.g. rho of American options is None.
+            result[i, j] = np.nan if value is None else value
+    return result
+
+
+def price_many(option_factory, option_names, dates, metric='price', workers=None, **kwargs):
+    """ Evaluate a metric of several options at several dates, splitting the options between worker processes.
+
+    QuantLib objects can't be sent to other processes, so each worker builds its own options (and their processes)
+    by calling `option_factory` once.
+
+    Parameters
+    ----------
+    option_factory: function
+        Picklable function (e.g. defined at module level) without arguments, returning a dict with
+        ``{ts_name: option}`` for the options in `option_names`.
+    option_names: list of str
+        Names of the options to evaluate.
+    dates: list of date-like
+        Dates of the evaluation. Each one is also used as the `base_date` of the metric.
+    metric: str, optional
+        Name of the :py:obj:`BaseEquityOption` method to evaluate, e.g. 'price', 'delta', 'gamma'. Default: 'price'.
+    workers: int, optional
+        Number of worker processes. Default: the number of CPUs. With 1, everything runs in the current process.
+    **kwargs
+        Other arguments passed to the metric method.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array with the metric of each option (rows) at each date (columns).
+    """
+    option_names = list(option_names)
+    dates = list(dates)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(min(workers, len(option_names)), 1)
+    if workers == 1:
+        # Keep the options local, so that none stays alive in _worker_options after the call.
+        return _price_options(option_factory(), option_names, dates, metric, kwargs)
+
+    # Each worker gets a contiguous chunk of options, so that it evaluates all dates of an option in sequence.
+    bounds = np.linspace(0, len(option_names), workers + 1).astype(int)
+    chunks = [option_names[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_price_many_worker,
+                             initargs=(option_factory,)) as executor:
+        results = executor.map(_price_many_chunk, chunks, [dates] * workers, [metric] * workers, [kwargs] * workers)
+        return np.vstack(list(results))